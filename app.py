@@ -1,12 +1,13 @@
-import streamlit as st
-import json
+import importlib
 import os
 
-# Import setup and game modules
-from setup.family_setup import family_setup_screen
-from games.meet_my_family import meet_my_family_screen
-from games.find_my_family import find_my_family_screen
-from games.who_is_speaking import who_is_speaking_screen
+import streamlit as st
+
+from utils.family_repository import has_family_data
+from utils.metrics import session_footprint, timer
+from utils.reruns import metrics_enabled, session_run
+from utils.styles import inject_styles
+from utils.tenants import PROCESS_TENANT, tenant_exists
 
 # --------------------------------------------------
 # Page Configuration
@@ -15,60 +16,33 @@ st.set_page_config(
     page_title="Know My Family",
     layout="wide"
 )
-st.markdown("""
-<style>
-    /* Full app background */
-    body {
-        background-color: #a5cad2;
-    }
-
-    /* Streamlit app container */
-    .stApp {
-        background-color: #a5cad2;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# ================= UI ENHANCEMENT ONLY =================
-st.markdown("""
-<style>
-    .main {
-        background-color: #6f5f90;
-    }
-    h1 {
-        text-align: center;
-        color: #3b3b3b;
-    }
-    .subtitle {
-        text-align: center;
-        font-size: 18px;
-        color: #666;
-        margin-bottom: 30px;
-    }
-    .card {
-        background-color: white;
-        padding: 25px;
-        border-radius: 16px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        height: 100%;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 10px;
-        padding: 10px;
-        font-size: 16px;
-    }
-    .parent-box {
-        background-color: #fff3cd;
-        padding: 15px;
-        border-radius: 12px;
-        margin-bottom: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
-# =======================================================
-
-DATA_FILE = "data/family_data.json"
+
+# --------------------------------------------------
+# Page registry: page -> (module, screen function)
+#
+# Screen modules (and PIL, audio, maze code behind them) are imported
+# the first time their page is opened, not at startup.
+# --------------------------------------------------
+PAGES = {
+    "setup": ("setup.family_setup", "family_setup_screen"),
+    "meet_my_family": ("games.meet_my_family", "meet_my_family_screen"),
+    "find_my_family": ("games.find_my_family", "find_my_family_screen"),
+    "who_is_speaking": ("games.who_is_speaking", "who_is_speaking_screen"),
+}
+
+
+def load_screen(page):
+    module_name, function_name = PAGES[page]
+    with timer(f"import:{page}"):
+        module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+# Optional media server for cacheable photo/voice URLs. Imported only
+# when KMF_MEDIA_PORT is set: it pulls in PIL and the audio/job modules.
+if os.environ.get("KMF_MEDIA_PORT", "0") != "0":
+    from utils.media_server import ensure_media_server
+
+    ensure_media_server()
 
 # --------------------------------------------------
 # Session State Initialization
@@ -76,18 +50,26 @@ DATA_FILE = "data/family_data.json"
 if "page" not in st.session_state:
     st.session_state.page = "setup"
 
+# Each session is bound to one family (?family=<id>) for its lifetime;
+# storage, media and caches are all partitioned by it
+if "tenant" not in st.session_state:
+    st.session_state.tenant = st.query_params.get("family", PROCESS_TENANT)
+
+# Only families set up with `python -m utils.tenants create <id>`;
+# an unknown id must not create storage just by being opened
+if not tenant_exists(st.session_state.tenant):
+    st.error("Unknown family link. Please check the link you were given.")
+    st.stop()
+
+# ?debug=1 turns on the timing panel for this session only
+if st.query_params.get("debug") == "1":
+    st.session_state.debug_metrics = True
+
 # --------------------------------------------------
 # Helper: Check if family data exists
 # --------------------------------------------------
 def is_setup_complete():
-    if not os.path.exists(DATA_FILE):
-        return False
-    try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
-        return len(data) > 0
-    except:
-        return False
+    return has_family_data()
 
 # --------------------------------------------------
 # Navigation Helper (CORRECT)
@@ -147,23 +129,56 @@ def home_screen():
         st.markdown("</div>", unsafe_allow_html=True)
 
 # --------------------------------------------------
-# MAIN APP FLOW
+# DEBUG: per-rerun timing and session memory panel
 # --------------------------------------------------
-if st.session_state.page == "setup":
-    family_setup_screen(go_to)
-
-elif not is_setup_complete():
-    st.session_state.page = "setup"
-    st.rerun()
-
-elif st.session_state.page == "home":
-    home_screen()
-
-elif st.session_state.page == "meet_my_family":
-    meet_my_family_screen(go_to)
+def debug_panel():
+    history = st.session_state.get("metrics_history", [])
+    with st.sidebar:
+        st.markdown("### ⏱ Rerun timings")
+        if not history:
+            st.caption("No reruns recorded yet.")
+            return
+        last = history[-1]
+        st.metric("Last rerun", f"{last['total_ms']:.1f} ms", help=last["page"])
+        st.caption("Previous rerun breakdown")
+        st.table({
+            "ms": {name: round(ms, 1) for name, ms in sorted(
+                last["timers_ms"].items(), key=lambda item: -item[1])},
+        })
+        if last["counters"]:
+            st.table({"count": {name: int(v) for name, v in sorted(last["counters"].items())}})
+        st.caption(f"Last {len(history)} reruns (ms)")
+        st.line_chart([record["total_ms"] for record in history])
+
+        sizes = session_footprint(st.session_state.to_dict())
+        st.markdown("### 🧠 Session state")
+        st.metric("Session state", f"{sum(sizes.values()) / 1024:.1f} KB")
+        st.table({"bytes": dict(sorted(sizes.items(), key=lambda item: -item[1])[:10])})
 
-elif st.session_state.page == "find_my_family":
-    find_my_family_screen(go_to)
 
-elif st.session_state.page == "who_is_speaking":
-    who_is_speaking_screen(go_to)
+# --------------------------------------------------
+# MAIN APP FLOW
+# --------------------------------------------------
+def dispatch(page):
+    if page != "setup":
+        with timer("setup_check"):
+            complete = is_setup_complete()
+        if not complete:
+            st.session_state.page = "setup"
+            st.rerun()
+
+    inject_styles(page)
+    if page == "home":
+        with timer("screen:home"):
+            home_screen()
+    elif page in PAGES:
+        screen = load_screen(page)
+        with timer(f"screen:{page}"):
+            screen(go_to)
+
+if metrics_enabled():
+    debug_panel()
+
+with session_run(st.session_state.page):
+    with timer("dispatch"):
+        dispatch(st.session_state.page)
@@ -0,0 +1,111 @@
+# --------------------------------------------------
+# Headless game engine benchmark
+#
+#   python -m benchmarks.bench_engines [--games 2000] [--family 20]
+#
+# Plays complete games against the pure-Python engines (no Streamlit)
+# and reports games per second for each one.
+# --------------------------------------------------
+import argparse
+import random
+import time
+
+from games.engine import MatchingGame, MazeGame, RecallScheduler, VoiceQuiz, DONE
+from games.maze import DIRECTIONS, cached_maze
+
+
+def play_matching(keys, rng, batch_size=None):
+    game = MatchingGame()
+    game.start(keys, rng, batch_size)
+    while game.stage != DONE:
+        remaining = [k for k in game.names if k not in game.matched]
+        game.select_name(rng.choice(remaining))
+        game.select_photo(rng.choice(remaining))
+    return game
+
+
+def play_maze(size, rng):
+    game = MazeGame(cached_maze(size, size, rng.randrange(64)), "target")
+    while game.stage != DONE:
+        # Mostly follow the distance map, sometimes bump into walls
+        if rng.random() < 0.2:
+            dr, dc, _ = rng.choice(DIRECTIONS)
+            game.move(dr, dc)
+            continue
+        label = game.maze.hint(game.pos)
+        dr, dc, _ = next(d for d in DIRECTIONS if d[2] == label)
+        game.move(dr, dc)
+    return game
+
+
+def play_quiz(keys, rng, rounds=5, scheduler=None):
+    game = VoiceQuiz(scheduler)
+    for _ in range(rounds):
+        game.new_round(keys, rng)
+        while not game.choose(rng.choice(game.options)):
+            pass
+    return game
+
+
+# A voice the child always gets wrong should keep coming back within a
+# few rounds however many voices have not been asked yet
+MISSED_VOICE_MAX_GAP = 3
+
+
+def missed_voice_rounds(family, rounds, rng):
+    keys = tuple(range(family))
+    game = VoiceQuiz()
+    asked = []
+    for number in range(rounds):
+        game.new_round(keys, rng)
+        if game.target == 0:
+            asked.append(number)
+            game.choose(next(o for o in game.options if o != 0))
+        game.choose(game.target)
+    return asked
+
+
+def run(label, games, play):
+    start = time.perf_counter()
+    for _ in range(games):
+        play()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {games / elapsed:>12,.0f} games/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless game engine benchmark")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--family", type=int, default=20)
+    parser.add_argument("--maze-size", type=int, default=11)
+    parser.add_argument("--quiz-family", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    keys = tuple(range(args.family))
+
+    run(f"Meet My Family ({args.family})", args.games, lambda: play_matching(keys, rng))
+    run(f"Meet My Family ({args.family}, 6 a round)", args.games,
+        lambda: play_matching(keys, rng, 6))
+    run(f"Find My Family ({args.maze_size}x{args.maze_size})", args.games,
+        lambda: play_maze(args.maze_size, rng))
+    run("Who Is Speaking (5 rounds)", args.games, lambda: play_quiz(keys, rng))
+
+    # One child's recall history carried across games, as in the app;
+    # rounds should cost the same whatever the family size
+    big = tuple(range(args.quiz_family))
+    scheduler = RecallScheduler()
+    scheduler.sync(big)
+    run(f"Who Is Speaking ({args.quiz_family} voices)", args.games,
+        lambda: play_quiz(big, rng, scheduler=scheduler))
+
+    asked = missed_voice_rounds(200, 60, rng)
+    gap = max(b - a for a, b in zip(asked, asked[1:]))
+    print(f"Missed voice asked at rounds {asked[:8]} (max gap {gap})")
+    if gap > MISSED_VOICE_MAX_GAP:
+        raise SystemExit(f"A missed voice took {gap} rounds to come back.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# --------------------------------------------------
+# Bulk import/export benchmark
+#
+#   python -m benchmarks.bench_import [--members 500] [--storage json]
+#
+# Builds a ZIP with a photo and a voice clip per member plus a
+# manifest.csv, imports it into an empty temporary data folder, then
+# exports the family again. Thumbnails and audio normalisation are
+# left to the background workers / first view, as in the app.
+# --------------------------------------------------
+import argparse
+import csv
+import io
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import wave
+import zipfile
+
+from PIL import Image
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_archive(count, rng):
+    buffer = io.BytesIO()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["name", "relationship", "image", "audio"])
+
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for i in range(count):
+            photo = io.BytesIO()
+            colour = tuple(rng.randrange(256) for _ in range(3))
+            Image.new("RGB", (800, 600), colour).save(photo, "JPEG")
+            archive.writestr(f"photos/member_{i}.jpg", photo.getvalue())
+
+            voice = io.BytesIO()
+            with wave.open(voice, "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(8000)
+                w.writeframes(struct.pack("<h", i) * 8000)
+            archive.writestr(f"voices/member_{i}.wav", voice.getvalue())
+
+            writer.writerow([
+                f"Member {i}", "Cousin", f"photos/member_{i}.jpg", f"voices/member_{i}.wav",
+            ])
+        archive.writestr("manifest.csv", manifest.getvalue())
+
+    buffer.seek(0)
+    return buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export benchmark")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    archive = build_archive(args.members, random.Random(0))
+    print(f"archive:  {args.members} members, {len(archive.getvalue()) / (1024 * 1024):.1f} MB")
+
+    workdir = tempfile.mkdtemp(prefix="kmf-import-")
+    os.chdir(workdir)
+    os.environ["KMF_STORAGE"] = args.storage
+    sys.path.insert(0, REPO_ROOT)
+    try:
+        from utils.bulk import export_family, import_family
+        from utils.jobs import media_jobs
+
+        start = time.perf_counter()
+        report = import_family(archive)
+        elapsed = time.perf_counter() - start
+        print(f"import:   {len(report.added)} added, {len(report.errors)} skipped "
+              f"in {elapsed:.2f}s ({len(report.added) / elapsed:.0f} members/s)")
+
+        start = time.perf_counter()
+        out = io.BytesIO()
+        exported = export_family(out)
+        elapsed = time.perf_counter() - start
+        print(f"export:   {exported} members, {len(out.getvalue()) / (1024 * 1024):.1f} MB "
+              f"in {elapsed:.2f}s")
+
+        # Post-processing that fitted in the queue; the rest is done on first view
+        start = time.perf_counter()
+        while media_jobs.pending_count():
+            time.sleep(0.05)
+        print(f"queued post-processing finished {time.perf_counter() - start:.2f}s later")
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
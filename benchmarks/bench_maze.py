@@ -0,0 +1,37 @@
+# --------------------------------------------------
+# Maze generation benchmark
+#
+#   python -m benchmarks.bench_maze [--runs 20]
+#
+# Prints the mean/max time to generate a maze (including the BFS
+# distance map) for a range of sizes.
+# --------------------------------------------------
+import argparse
+import time
+
+from games.maze import generate_maze
+
+SIZES = (5, 11, 25, 51, 101, 201)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maze generation benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'mean ms':>10} {'max ms':>10}")
+    for size in SIZES:
+        timings = []
+        for seed in range(args.runs):
+            start = time.perf_counter()
+            maze = generate_maze(size, size, seed)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert maze.is_solvable()
+        print(
+            f"{size:>4}x{size:<4} {sum(timings) / len(timings):>10.2f} "
+            f"{max(timings):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
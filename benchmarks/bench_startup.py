@@ -0,0 +1,107 @@
+# --------------------------------------------------
+# Startup benchmark
+#
+#   python -m benchmarks.bench_startup [--runs 5] [--family 12]
+#
+# Every measurement runs in a fresh interpreter so nothing is already
+# imported. Prints:
+#   - the import cost of each screen module (on top of streamlit)
+#   - cold first render of each page through AppTest, and the warm
+#     rerun after it
+#   - which screen modules the home page pulled in (should be none)
+# --------------------------------------------------
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.load_test import APP_PATH, REPO_ROOT, build_family
+
+MODULES = (
+    "setup.family_setup",
+    "games.meet_my_family",
+    "games.find_my_family",
+    "games.who_is_speaking",
+)
+PAGES = ("home", "setup", "meet_my_family", "find_my_family", "who_is_speaking")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+import streamlit
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.session_state["page"] = {page!r}
+at.run()
+cold = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+at.run()
+warm = (time.perf_counter() - start) * 1000
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(json.dumps({{
+    "cold_ms": cold,
+    "warm_ms": warm,
+    "loaded": [m for m in {modules!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_child(script, cwd):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--family", type=int, default=12)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="kmf-startup-")
+    try:
+        build_family(workdir, args.family, random.Random(0))
+
+        print(f"{'module import':<24} {'mean ms':>10}")
+        for module in MODULES:
+            timings = [
+                run_child(IMPORT_SCRIPT.format(module=module), workdir)["ms"]
+                for _ in range(args.runs)
+            ]
+            print(f"{module:<24} {mean(timings):>10.1f}")
+
+        print()
+        print(f"{'page':<24} {'cold ms':>10} {'warm ms':>10}  screen modules loaded")
+        for page in PAGES:
+            script = RENDER_SCRIPT.format(app=APP_PATH, page=page, modules=MODULES)
+            results = [run_child(script, workdir) for _ in range(args.runs)]
+            loaded = ", ".join(results[-1]["loaded"]) or "-"
+            print(
+                f"{page:<24} {mean([r['cold_ms'] for r in results]):>10.1f} "
+                f"{mean([r['warm_ms'] for r in results]):>10.1f}  {loaded}"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
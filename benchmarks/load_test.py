@@ -0,0 +1,307 @@
+# --------------------------------------------------
+# Load test: many simulated children playing at once
+#
+#   python -m benchmarks.load_test --sessions 20 --family 30 --loops 2
+#
+# Builds a synthetic family (photos + voice clips) in a temporary
+# data folder, then drives N concurrent sessions of app.py through
+# Streamlit's AppTest: setup -> home -> each game -> play again.
+# Every rerun is timed. Prints p50/p95/p99 latency per step,
+# throughput and memory per session. --max-p95-ms / --max-p99-ms turn
+# it into a regression gate (exit code 1 when exceeded).
+#
+# Everything runs offline in one process, like `streamlit run app.py`.
+# AppTest swaps a process-global runtime in and out around each run,
+# so reruns from the session threads are serialised through a lock.
+# "latency" includes the time spent waiting for that lock (what a
+# child would feel on a busy server); "service" is the rerun alone.
+# --------------------------------------------------
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+from collections import defaultdict
+
+from PIL import Image
+
+from utils.metrics import session_footprint
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+
+RELATIONSHIPS = ["Mother", "Father", "Grandma", "Grandpa", "Aunt", "Uncle", "Cousin"]
+
+
+# --------------------------------------------------
+# Synthetic family
+# --------------------------------------------------
+def build_family(root, size, rng):
+    images = os.path.join(root, "data", "images")
+    audio = os.path.join(root, "data", "audio")
+    os.makedirs(images)
+    os.makedirs(audio)
+
+    members = []
+    for i in range(size):
+        image_name = f"member_{i}.jpg"
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", (1600, 1200), colour).save(os.path.join(images, image_name))
+
+        audio_name = f"member_{i}.wav"
+        with wave.open(os.path.join(audio, audio_name), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            pitch = 200 + 20 * i
+            w.writeframes(b"".join(
+                struct.pack("<h", int(8000 * math.sin(2 * math.pi * pitch * n / 16000)))
+                for n in range(16000)
+            ))
+
+        members.append({
+            "id": i + 1,
+            "name": f"Member {i}",
+            "relationship": rng.choice(RELATIONSHIPS),
+            "image": image_name,
+            "audio": audio_name,
+        })
+
+    with open(os.path.join(root, "data", "family_data.json"), "w") as f:
+        json.dump(members, f)
+
+
+# --------------------------------------------------
+# One scripted session
+# --------------------------------------------------
+_run_lock = threading.Lock()
+
+
+class Session:
+
+    def __init__(self, stats):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(APP_PATH, default_timeout=60)
+        self.stats = stats
+
+    def run(self, step):
+        queued = time.perf_counter()
+        with _run_lock:
+            start = time.perf_counter()
+            self.at.run()
+            finished = time.perf_counter()
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].message}")
+        self.stats.record(step, (finished - queued) * 1000, (finished - start) * 1000)
+        self.stats.record_state(self.state_size())
+
+    # Pickled size of the user-visible session state, in bytes
+    def state_size(self):
+        return sum(session_footprint(self.at.session_state.to_dict()).values())
+
+    def click(self, step, match):
+        buttons = [b for b in self.at.button if match(b)]
+        if not buttons:
+            raise RuntimeError(f"{step}: button not found")
+        buttons[0].click()
+        self.run(step)
+
+    def goto(self, page):
+        self.at.session_state["page"] = page
+        self.run(f"{page}: open")
+
+    def play_meet(self, rng):
+        self.goto("meet_my_family")
+        self.click("meet: start", lambda b: "Start" in b.label)
+        while True:
+            names = [b for b in self.at.button if (b.key or "").startswith("name_")]
+            if not names:
+                break
+            pick = rng.choice(names)
+            wanted = "photo_" + pick.key.split("_", 1)[1]
+            pick.click()
+            self.run("meet: select name")
+
+            # Right photo 70% of the time, otherwise a random one
+            photos = [b for b in self.at.button if (b.key or "").startswith("photo_")]
+            right = [b for b in photos if b.key == wanted]
+            (right[0] if right and rng.random() < 0.7 else rng.choice(photos)).click()
+            self.run("meet: select photo")
+        self.click("meet: back", lambda b: "Back to Home" in b.label)
+
+    def play_find(self, rng):
+        self.goto("find_my_family")
+        self.click("find: start", lambda b: "Start" in b.label)
+        for _ in range(500):
+            if any("reached" in s.value for s in self.at.success):
+                break
+            self.click("find: hint", lambda b: "Hint" in b.label)
+            hints = [w.value for w in self.at.warning if "Try" in w.value]
+            if not hints:
+                break
+            label = hints[0].split("Try ")[-1]
+            self.click("find: move", lambda b: b.label == label)
+        self.click("find: play again", lambda b: "Play Again" in b.label)
+        self.click("find: back", lambda b: "Back to Home" in b.label)
+
+    def play_who(self, rng):
+        self.goto("who_is_speaking")
+        self.click("who: start", lambda b: "Start" in b.label)
+        options = [b for b in self.at.button if (b.key or "").startswith("choose_")]
+        rng.choice(options).click()
+        self.run("who: choose")
+        self.click("who: play again", lambda b: "Play Again" in b.label)
+        self.click("who: back", lambda b: "Back to Home" in b.label)
+
+    def play(self, loops, rng):
+        self.run("setup: open")
+        self.click("setup: finish", lambda b: "Finish Setup" in b.label)
+        for _ in range(loops):
+            self.play_meet(rng)
+            self.play_find(rng)
+            self.play_who(rng)
+
+
+# --------------------------------------------------
+# Reporting
+# --------------------------------------------------
+class Stats:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = defaultdict(list)
+        self.service = defaultdict(list)
+        self.state_sizes = []
+
+    def record(self, step, latency_ms, service_ms):
+        with self.lock:
+            self.latency[step].append(latency_ms)
+            self.service[step].append(service_ms)
+
+    def record_state(self, size):
+        with self.lock:
+            self.state_sizes.append(size)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--family", type=int, default=12)
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-p95-ms", type=float)
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--keep-data", action="store_true")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report Python heap growth (slows the run down)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+
+    workdir = tempfile.mkdtemp(prefix="kmf-load-")
+    build_family(workdir, args.family, rng)
+
+    # The app resolves data/ relative to the working directory
+    os.chdir(workdir)
+    # AppTest cannot run the browser-side maze, so sessions walk it with
+    # the server-side arrow pad (one rerun per move, the heavier case)
+    os.environ.setdefault("KMF_MAZE_CLIENT", "0")
+    sys.path.insert(0, REPO_ROOT)
+
+    stats = Stats()
+    errors = []
+    sessions = []
+
+    def worker(seed):
+        try:
+            session = Session(stats)
+            sessions.append(session)
+            session.play(args.loops, random.Random(seed))
+        except Exception as e:
+            errors.append(e)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    threads = [
+        threading.Thread(target=worker, args=(args.seed + i,))
+        for i in range(args.sessions)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    elapsed = time.perf_counter() - started
+    if args.trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if not args.keep_data:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    all_latency = [t for values in stats.latency.values() for t in values]
+    all_service = [t for values in stats.service.values() for t in values]
+    if not all_latency:
+        print("No reruns completed.", *errors, sep="\n")
+        return 1
+
+    print(f"{'step':<22} {'runs':>6} {'service p50':>12} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for step in sorted(stats.latency):
+        values = stats.latency[step]
+        print(
+            f"{step:<22} {len(values):>6} {percentile(stats.service[step], 50):>12.1f} "
+            f"{percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f} "
+            f"{percentile(values, 99):>9.1f}"
+        )
+
+    p95 = percentile(all_latency, 95)
+    p99 = percentile(all_latency, 99)
+    print()
+    print(f"sessions:           {args.sessions} ({len(errors)} failed)")
+    print(f"family size:        {args.family}")
+    print(f"reruns:             {len(all_latency)} in {elapsed:.1f}s "
+          f"({len(all_latency) / elapsed:.1f} reruns/s)")
+    print(f"rerun service time: p50 {percentile(all_service, 50):.1f} ms, "
+          f"p95 {percentile(all_service, 95):.1f} ms")
+    print(f"rerun latency:      p50 {percentile(all_latency, 50):.1f} ms, "
+          f"p95 {p95:.1f} ms, p99 {p99:.1f} ms")
+    print(f"session state:      mean {sum(stats.state_sizes) / len(stats.state_sizes) / 1024:.1f} KB, "
+          f"max {max(stats.state_sizes) / 1024:.1f} KB per session")
+    if args.trace_memory:
+        print(f"heap growth:        {current / max(1, len(sessions)) / 1024:.0f} KB per session "
+              f"(peak total {peak / (1024 * 1024):.1f} MB)")
+    for e in errors[:5]:
+        print(f"error: {e}")
+
+    failed = bool(errors)
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        print(f"FAIL: p95 {p95:.1f} ms > {args.max_p95_ms} ms")
+        failed = True
+    if args.max_p99_ms is not None and p99 > args.max_p99_ms:
+        print(f"FAIL: p99 {p99:.1f} ms > {args.max_p99_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+import heapq
+import itertools
+import random
+from collections import deque
+
+# --------------------------------------------------
+# Headless game rules
+#
+# Pure-Python state machines for the three games, with no Streamlit
+# imports. Each screen keeps one of these objects in session state
+# and only renders it, so the rules can be simulated and benchmarked
+# without a script rerun (see benchmarks/bench_engines.py).
+#
+# Members are referred to by opaque hashable keys chosen by the
+# screen.
+#
+# Matching and voice games always know their next round
+# (`upcoming`), so the screen can warm its media in the background
+# before "Play Again" is pressed.
+# --------------------------------------------------
+INTRO = "intro"
+PLAYING = "playing"
+DONE = "done"
+
+
+# --------------------------------------------------
+# Meet My Family: match each name to its photo
+#
+# A game is a schedule of batches of at most batch_size pairs (all
+# of them when batch_size is None), fixed when the game is planned.
+# names / photos only ever hold the current batch, so a screen
+# renders k pairs at a time whatever the size of the family.
+# --------------------------------------------------
+class MatchingGame:
+
+    __slots__ = (
+        "stage", "names", "photos", "selected", "matched", "message",
+        "upcoming", "batches", "batch", "batch_size",
+    )
+
+    def __init__(self):
+        self.stage = INTRO
+        self.names = []
+        self.photos = []
+        self.selected = None
+        self.matched = set()
+        self.message = ""
+        self.upcoming = None
+        self.batches = ()
+        self.batch = 0
+        self.batch_size = None
+
+    # Picks the batches, each a (names, photos) order, of the next game.
+    # Batch sizes differ by at most one, so there is no 1-pair leftover.
+    def plan_round(self, keys, rng=random, batch_size=None):
+        keys = list(keys)
+        order = rng.sample(keys, len(keys))
+        count = -(-len(order) // batch_size) if batch_size else min(1, len(order))
+        batches = []
+        for i in range(count):
+            chunk = order[i * len(order) // count:(i + 1) * len(order) // count]
+            batches.append((chunk, rng.sample(chunk, len(chunk))))
+        self.upcoming = tuple(batches)
+        self.batch_size = batch_size
+        return self.upcoming
+
+    def start(self, keys, rng=random, batch_size=None):
+        keys = list(keys)
+        planned = self.upcoming
+        if (
+            planned is None
+            or batch_size != self.batch_size
+            or {k for names, _ in planned for k in names} != set(keys)
+        ):
+            planned = self.plan_round(keys, rng, batch_size)
+        self.batches = planned
+        self.plan_round(keys, rng, batch_size)
+        self.selected = None
+        self.matched = set()
+        self.message = ""
+        self._load_batch(0)
+        self.stage = PLAYING if keys else DONE
+
+    def _load_batch(self, index):
+        self.batch = index
+        self.names, self.photos = self.batches[index] if self.batches else ([], [])
+
+    @property
+    def total(self):
+        return sum(len(names) for names, _ in self.batches)
+
+    # Keys of the batch after the current one (empty on the last)
+    def next_batch(self):
+        if self.batch + 1 < len(self.batches):
+            return self.batches[self.batch + 1][1]
+        return []
+
+    def select_name(self, key):
+        if key not in self.matched:
+            self.selected = key
+            self.message = ""
+
+    def select_photo(self, key):
+        correct = self.selected is not None and self.selected == key
+        if correct:
+            self.matched.add(key)
+            self.message = "Correct! 🎉"
+        else:
+            self.message = "Try again 🙂"
+        self.selected = None
+        if correct:
+            self._finish_batch()
+        return correct
+
+    # Moves on once every pair on the board is matched
+    def _finish_batch(self):
+        while self.stage == PLAYING and all(k in self.matched for k in self.names):
+            if self.batch + 1 < len(self.batches):
+                self._load_batch(self.batch + 1)
+                self.message = "Round complete! 🎉 Here come the next ones."
+            else:
+                self.stage = DONE
+
+    # Members deleted mid-game leave their batches (batches left empty
+    # are dropped), so the current batch can still be finished
+    def drop(self, keys):
+        keys = set(keys)
+        batches = []
+        current = 0
+        for index, (names, photos) in enumerate(self.batches):
+            names = [k for k in names if k not in keys]
+            if index == self.batch:
+                current = len(batches)
+            elif not names:
+                continue
+            batches.append((names, [k for k in photos if k not in keys]))
+        self.batches = tuple(batches)
+        self.matched -= keys
+        if self.selected in keys:
+            self.selected = None
+        self._load_batch(current)
+        self._finish_batch()
+
+
+# --------------------------------------------------
+# Find My Family: walk the maze to the target
+# --------------------------------------------------
+class MazeGame:
+
+    __slots__ = ("id", "stage", "maze", "pos", "target", "message", "moves")
+
+    # Unique per game, so a restart on the same maze is a new game to the
+    # browser board (id() of a freed game can be reused)
+    _ids = itertools.count(1)
+
+    # Move codes used when a whole path is played at once
+    STEPS = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+    def __init__(self, maze, target):
+        self.id = next(MazeGame._ids)
+        self.stage = PLAYING
+        self.maze = maze
+        self.pos = maze.start
+        self.target = target
+        self.message = ""
+        self.moves = 0
+
+    def move(self, dr, dc):
+        if self.stage == DONE:
+            return False
+        r, c = self.pos
+        if not self.maze.is_open(r + dr, c + dc):
+            self.message = "🚫 Can't go that way!"
+            return False
+        self.pos = (r + dr, c + dc)
+        self.message = ""
+        self.moves += 1
+        if self.pos == self.maze.goal:
+            self.stage = DONE
+        return True
+
+    # Replays a path played elsewhere (e.g. in the browser), as "UURDD".
+    # Stops at the first invalid step; True when it reaches the goal.
+    def play_path(self, path):
+        for code in path:
+            step = self.STEPS.get(code)
+            if step is None or not self.move(*step):
+                return False
+        return self.stage == DONE
+
+    def hint(self):
+        hint = self.maze.hint(self.pos)
+        if hint:
+            self.message = f"💡 Try {hint}"
+        return hint
+
+
+# --------------------------------------------------
+# Who Is Speaking: per-child recall scheduling
+#
+# Every voice the child has heard has a due round and a smoothed
+# recall estimate; a heap ordered by (due, recall) yields the next
+# review in O(log n). A correct first answer doubles the gap before
+# the voice comes back, a wrong one makes it due on the next round.
+# Voices not heard yet wait in a queue and are only introduced when
+# no review is due, so practice goes to the voices the child gets
+# wrong however large the family. Heap entries are replaced, not
+# updated: stale ones are skipped when popped.
+#
+# sync() is O(n) but only runs when the candidate sequence object
+# changes (the repository hands out the same tuple until the family
+# changes); everything per round is O(k log n).
+# --------------------------------------------------
+class RecallScheduler:
+
+    __slots__ = (
+        "keys", "positions", "stats", "heap", "round",
+        "_entries", "_unseen", "_unseen_keys", "_source", "_counter",
+    )
+
+    MAX_STREAK = 6
+
+    def __init__(self):
+        self.keys = ()
+        self.positions = {}
+        self.stats = {}
+        self.heap = []
+        self.round = 0
+        self._entries = {}
+        self._unseen = deque()
+        self._unseen_keys = set()
+        self._source = None
+        self._counter = 0
+
+    def sync(self, keys):
+        if keys is self._source:
+            return
+        self._source = keys
+        self.keys = tuple(keys)
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        for key in self.keys:
+            if key not in self.stats:
+                # [correct, attempts, streak, due]
+                self.stats[key] = [0, 0, 0, 0]
+            if key in self._entries or key in self._unseen_keys:
+                continue
+            if self.stats[key][1]:
+                self._push(key)
+            else:
+                self._unseen.append(key)
+                self._unseen_keys.add(key)
+
+    def recall(self, key):
+        correct, attempts = self.stats[key][:2]
+        return (correct + 1) / (attempts + 2)
+
+    def _push(self, key):
+        self._counter += 1
+        entry = (self.stats[key][3], self.recall(key), self._counter, key)
+        self._entries[key] = entry
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self._entries) + 16:
+            self._compact()
+
+    # Drop stale entries (amortised O(1) per push)
+    def _compact(self):
+        self._entries = {k: e for k, e in self._entries.items() if k in self.positions}
+        self.heap = list(self._entries.values())
+        heapq.heapify(self.heap)
+
+    def _current(self, entry):
+        return entry[3] in self.positions and self._entries.get(entry[3]) is entry
+
+    # Most urgent review entry, other than `avoid` when there is a choice
+    def _pop_review(self, avoid):
+        skipped = None
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if not self._current(entry):
+                continue
+            if entry[3] == avoid and len(self.keys) > 1 and skipped is None:
+                skipped = entry
+                continue
+            break
+        else:
+            entry = skipped
+            skipped = None
+        if skipped is not None:
+            heapq.heappush(self.heap, skipped)
+        return entry
+
+    # Next voice not heard yet (voices removed from the family are dropped)
+    def _pop_unseen(self):
+        while self._unseen:
+            key = self._unseen.popleft()
+            self._unseen_keys.discard(key)
+            if key in self.positions:
+                return key
+        return None
+
+    def next_target(self, avoid=None):
+        entry = self._pop_review(avoid)
+        key = None
+        if entry is None or entry[0] > self.round + 1:
+            # Nothing due: introduce a new voice if there is one left
+            key = self._pop_unseen()
+            if key is not None and entry is not None:
+                heapq.heappush(self.heap, entry)
+        if key is None:
+            if entry is None:
+                return None
+            key = entry[3]
+
+        self.round += 1
+        # Asked: not due again until answered (or a full pass later)
+        self.stats[key][3] = self.round + len(self.keys)
+        self._push(key)
+        return key
+
+    def record(self, key, correct):
+        stats = self.stats.get(key)
+        if stats is None:
+            return
+        stats[1] += 1
+        if correct:
+            stats[0] += 1
+            stats[2] = min(stats[2] + 1, self.MAX_STREAK)
+            stats[3] = self.round + 2 ** stats[2]
+        else:
+            stats[2] = 0
+            stats[3] = self.round + 1
+        self._push(key)
+
+    # k - 1 distinct keys other than `key`, without touching the rest
+    def distractors(self, key, k, rng=random):
+        i = self.positions[key]
+        picks = rng.sample(range(len(self.keys) - 1), min(k, len(self.keys) - 1))
+        return [self.keys[j + 1 if j >= i else j] for j in picks]
+
+
+# --------------------------------------------------
+# Who Is Speaking: pick the speaker out of a few options
+# --------------------------------------------------
+class VoiceQuiz:
+
+    __slots__ = ("stage", "target", "options", "last_correct", "upcoming", "scheduler")
+
+    OPTION_COUNT = 3
+
+    def __init__(self, scheduler=None):
+        self.stage = INTRO
+        self.target = None
+        self.options = []
+        self.last_correct = None
+        self.upcoming = None
+        self.scheduler = scheduler if scheduler is not None else RecallScheduler()
+
+    # Picks the (target, options) of the next round
+    def plan_round(self, candidates, rng=random):
+        self.scheduler.sync(candidates)
+        target = self.scheduler.next_target(avoid=self.target)
+        options = self.scheduler.distractors(target, self.OPTION_COUNT - 1, rng)
+        options.insert(rng.randrange(len(options) + 1), target)
+        self.upcoming = (target, options)
+        return self.upcoming
+
+    def new_round(self, candidates, rng=random):
+        self.scheduler.sync(candidates)
+        # A planned round is only used while all its members still exist
+        positions = self.scheduler.positions
+        if self.upcoming is None or not all(o in positions for o in self.upcoming[1]):
+            self.plan_round(candidates, rng)
+        self.target, self.options = self.upcoming
+        self.plan_round(candidates, rng)
+        self.last_correct = None
+        self.stage = PLAYING
+
+    def choose(self, key):
+        correct = key == self.target
+        # Only the first answer of a round counts towards recall
+        if self.last_correct is None:
+            self.scheduler.record(self.target, correct)
+        self.last_correct = correct
+        return correct
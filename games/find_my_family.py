@@ -1,62 +1,139 @@
 import streamlit as st
-import json
 import os
 import random
-from PIL import Image
 
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
+from games.engine import MazeGame, DONE
+from games.maze import cached_maze
+from games.maze_component import maze_board, maze_definition
+from games.maze_view import render_maze
+from utils.family_repository import load_family_data, get_member
+from utils.media_view import photo_source, show_photo
+from utils.member_grid import member_grid
+from utils.prefetch import prefetch
+from utils.reruns import fragment
 
 GRID_SIZE = 5
+GRID_SIZES = (5, 7, 9, 11, 15)
 
-# ================= UI ENHANCEMENT ONLY =================
-st.markdown("""
-<style>
-    /* Full app background */
-    body {
-        background-color: #a5cad2;
-    }
-
-    /* Streamlit app container */
-    .stApp {
-        background-color: #a5cad2;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-    .main {
-        background-color: #a5cad2;
-    }
-    .card {
-        background-color: white;
-        padding: 16px;
-        border-radius: 16px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        margin-bottom: 15px;
-        text-align: center;
-    }
-    .maze-cell {
-        font-size: 28px;
-        text-align: center;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 10px;
-        padding: 10px;
-        font-size: 16px;
-    }
-</style>
-""", unsafe_allow_html=True)
-# ======================================================
+# Play the maze in the browser (keyboard arrows, no rerun per move)
+CLIENT_MAZE = os.environ.get("KMF_MAZE_CLIENT", "1") != "0"
 
 # -----------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+# Next game: (size, seed, target id), picked ahead of time so the
+# maze, its board and the target photo are ready when it starts
+# -----------------------------------
+def warm_maze(size, seed, target_id):
+    maze = cached_maze(size, size, seed)
+    target = get_member(target_id)
+    photo = photo_source(target["image"], 48) if target else None
+    if CLIENT_MAZE:
+        maze_definition(maze)
+    else:
+        render_maze(maze, maze.start, photo)
+
+
+def plan_next_game(family, size):
+    plan = st.session_state.get("maze_next")
+    if plan is None or plan[0] != size or get_member(plan[2]) is None:
+        plan = (size, random.randrange(2 ** 32), random.choice(family)["id"])
+        st.session_state.maze_next = plan
+    prefetch(("find",) + plan, warm_maze, *plan)
+    return plan
+
+
+def start_game(family, size):
+    size, seed, target_id = plan_next_game(family, size)
+    del st.session_state.maze_next
+    st.session_state.maze_game = MazeGame(cached_maze(size, size, seed), target_id)
+
+# -----------------------------------
+# Server-side board and arrow pad: one rerun per move
+# (KMF_MAZE_CLIENT=0, or where the component cannot run)
+# -----------------------------------
+def button_pad(game, photo):
+    # Board and message are filled in after the move buttons below,
+    # so they already show the result of this click
+    board = st.empty()
+    message = st.empty()
+
+    # =====================================================
+    # MOVE BUTTONS
+    # =====================================================
+    st.markdown("### Move the child")
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col2:
+        if st.button("⬆ Up"):
+            game.move(-1, 0)
+
+    with col1:
+        if st.button("⬅ Left"):
+            game.move(0, -1)
+
+    with col3:
+        if st.button("➡ Right"):
+            game.move(0, 1)
+
+    with col2:
+        if st.button("⬇ Down"):
+            game.move(1, 0)
+
+    with col3:
+        if st.button("💡 Hint"):
+            game.hint()
+
+    # =====================================================
+    # DRAW MAZE (ONE HTML BLOCK)
+    # =====================================================
+    board.markdown(
+        render_maze(
+            game.maze,
+            game.pos,
+            photo,
+        ),
+        unsafe_allow_html=True,
+    )
+
+    # =====================================================
+    # MESSAGE
+    # =====================================================
+    if game.message:
+        message.warning(game.message)
+
+
+# -----------------------------------
+# Board, arrow pad and result: a fragment, so a move only reruns
+# this part of the page
+# -----------------------------------
+@fragment
+def maze_area():
+    game = st.session_state.maze_game
+    target = get_member(game.target)
+    if target is None:
+        st.rerun()
+
+    photo = photo_source(target["image"], 48)
+    if CLIENT_MAZE:
+        # Moves, walls and hints run in the browser; the finished path
+        # arrives once and is checked against the maze here
+        path = maze_board(game.maze, game.id, photo)
+        if path and game.stage != DONE and not game.play_path(path):
+            st.session_state.maze_game = MazeGame(game.maze, game.target)
+            st.rerun()
+    else:
+        button_pad(game, photo)
+
+    # =====================================================
+    # SUCCESS
+    # =====================================================
+    if game.stage == DONE:
+        st.balloons()
+        st.success(f"🎉 You reached {target['name']}!")
+
+        if st.button("🔁 Play Again"):
+            start_game(load_family_data(), game.maze.rows)
+            st.rerun()
 
 # -----------------------------------
 def find_my_family_screen(go_to):
@@ -73,41 +150,32 @@ def find_my_family_screen(go_to):
     # -----------------------------------
     # SESSION STATE INIT
     # -----------------------------------
-    if "started" not in st.session_state:
-        st.session_state.started = False
-
-    if "pos" not in st.session_state:
-        st.session_state.pos = (0, 0)
-
-    if "target" not in st.session_state:
-        st.session_state.target = random.choice(family)
-
-    if "msg" not in st.session_state:
-        st.session_state.msg = ""
+    if "maze_size" not in st.session_state:
+        st.session_state.maze_size = GRID_SIZE
 
     # =====================================================
     # START SCREEN (FAMILY VIEW)
     # =====================================================
-    if not st.session_state.started:
+    if "maze_game" not in st.session_state:
         st.subheader("👨‍👩‍👧 My Family")
 
-        cols = st.columns(3)
-        for i, m in enumerate(family):
-            with cols[i % 3]:
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
+        def family_card(m):
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+
+            show_photo(m["image"], 120)
 
-                img = os.path.join(IMAGE_FOLDER, m["image"])
-                if os.path.exists(img):
-                    st.image(Image.open(img), width=120)
+            st.markdown(f"**{m['name']}**")
+            st.write(m["relationship"])
 
-                st.markdown(f"**{m['name']}**")
-                st.write(m["relationship"])
+            st.markdown("</div>", unsafe_allow_html=True)
 
-                st.markdown("</div>", unsafe_allow_html=True)
+        member_grid(family, "find_grid", family_card)
+
+        st.select_slider("Maze size", options=GRID_SIZES, key="maze_size")
+        plan_next_game(family, st.session_state.maze_size)
 
         if st.button("▶ Start Game"):
-            st.session_state.started = True
-            st.session_state.msg = ""
+            start_game(family, st.session_state.maze_size)
             st.rerun()
 
         if st.button("⬅ Back to Home"):
@@ -115,99 +183,28 @@ def find_my_family_screen(go_to):
 
         return
 
+    game = st.session_state.maze_game
+    target = get_member(game.target)
+    if target is None:
+        # The target was removed meanwhile
+        st.session_state.pop("maze_game", None)
+        st.rerun()
+
+    # Replays keep the size the game was started with
+    plan_next_game(family, game.maze.rows)
+
     # =====================================================
     # TASK
     # =====================================================
     st.info(
         f"👶 Go to "
-        f"**{st.session_state.target['relationship']} "
-        f"({st.session_state.target['name']})**"
+        f"**{target['relationship']} "
+        f"({target['name']})**"
     )
 
-    # =====================================================
-    # DRAW MAZE GRID (VISUAL ONLY)
-    # =====================================================
-    for r in range(GRID_SIZE):
-        cols = st.columns(GRID_SIZE)
-        for c in range(GRID_SIZE):
-            with cols[c]:
-                if (r, c) == st.session_state.pos:
-                    st.markdown("<div class='maze-cell'>👶</div>", unsafe_allow_html=True)
-                elif (r, c) == (4, 4):
-                    img = os.path.join(
-                        IMAGE_FOLDER,
-                        st.session_state.target["image"]
-                    )
-                    if os.path.exists(img):
-                        st.image(Image.open(img), width=45)
-                elif [
-                    [1, 1, 1, 1, 1],
-                    [0, 0, 1, 1, 1],
-                    [1, 1, 1, 0, 1],
-                    [1, 0, 0, 1, 1],
-                    [1, 1, 1, 0, 1],
-                ][r][c] == 1:
-                    st.markdown("<div class='maze-cell'>🟣</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div class='maze-cell'>⬛</div>", unsafe_allow_html=True)
-
-    # =====================================================
-    # MESSAGE
-    # =====================================================
-    if st.session_state.msg:
-        st.warning(st.session_state.msg)
-
-    # =====================================================
-    # MOVE LOGIC (UNCHANGED)
-    # =====================================================
-    r, c = st.session_state.pos
-
-    def move(nr, nc):
-        if 0 <= nr < GRID_SIZE and 0 <= nc < GRID_SIZE and [
-            [1, 1, 1, 1, 1],
-            [0, 0, 1, 1, 1],
-            [1, 1, 1, 0, 1],
-            [1, 0, 0, 1, 1],
-            [1, 1, 1, 0, 1],
-        ][nr][nc] == 1:
-            st.session_state.pos = (nr, nc)
-            st.session_state.msg = ""
-        else:
-            st.session_state.msg = "🚫 Can't go that way!"
-
-    st.markdown("### Move the child")
-
-    col1, col2, col3 = st.columns([1, 1, 1])
-
-    with col2:
-        if st.button("⬆ Up"):
-            move(r - 1, c)
-
-    with col1:
-        if st.button("⬅ Left"):
-            move(r, c - 1)
-
-    with col3:
-        if st.button("➡ Right"):
-            move(r, c + 1)
-
-    with col2:
-        if st.button("⬇ Down"):
-            move(r + 1, c)
-
-    # =====================================================
-    # SUCCESS
-    # =====================================================
-    if st.session_state.pos == (4, 4):
-        st.balloons()
-        st.success(f"🎉 You reached {st.session_state.target['name']}!")
-
-        if st.button("🔁 Play Again"):
-            for k in ["started", "pos", "target", "msg"]:
-                st.session_state.pop(k, None)
-            st.rerun()
+    maze_area()
 
     if st.button("⬅ Back to Home"):
-        for k in ["started", "pos", "target", "msg"]:
-            st.session_state.pop(k, None)
+        st.session_state.pop("maze_game", None)
+        st.session_state.pop("maze_next", None)
         go_to("home")
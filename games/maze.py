@@ -0,0 +1,134 @@
+import functools
+import random
+from array import array
+from collections import deque
+
+# (row delta, col delta, label) for the four moves
+DIRECTIONS = (
+    (-1, 0, "⬆ Up"),
+    (1, 0, "⬇ Down"),
+    (0, -1, "⬅ Left"),
+    (0, 1, "➡ Right"),
+)
+
+
+# --------------------------------------------------
+# Maze grid
+#
+# Cells are stored row-major in a bytearray (1 = path, 0 = wall), so
+# a wall test is one index. `distance` holds the BFS step count from
+# every cell to the goal (-1 = unreachable), computed once, which makes
+# hints and the solvability check O(1).
+# --------------------------------------------------
+class Maze:
+
+    __slots__ = ("rows", "cols", "cells", "start", "goal", "distance")
+
+    def __init__(self, rows, cols, cells, start, goal):
+        self.rows = rows
+        self.cols = cols
+        self.cells = cells
+        self.start = start
+        self.goal = goal
+        self.distance = self._distances_from(goal)
+
+    @classmethod
+    def from_rows(cls, layout, start, goal):
+        cells = bytearray(v for row in layout for v in row)
+        return cls(len(layout), len(layout[0]), cells, start, goal)
+
+    def is_open(self, r, c):
+        return (
+            0 <= r < self.rows
+            and 0 <= c < self.cols
+            and self.cells[r * self.cols + c] == 1
+        )
+
+    def _distances_from(self, origin):
+        distance = array("i", [-1]) * (self.rows * self.cols)
+        if not self.is_open(*origin):
+            return distance
+        distance[origin[0] * self.cols + origin[1]] = 0
+        queue = deque([origin])
+        while queue:
+            r, c = queue.popleft()
+            step = distance[r * self.cols + c] + 1
+            for dr, dc, _ in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if self.is_open(nr, nc) and distance[nr * self.cols + nc] < 0:
+                    distance[nr * self.cols + nc] = step
+                    queue.append((nr, nc))
+        return distance
+
+    def distance_to_goal(self, r, c):
+        return self.distance[r * self.cols + c]
+
+    def is_solvable(self):
+        return self.distance_to_goal(*self.start) >= 0
+
+    # Label of a move that gets one step closer to the goal (None at the goal)
+    def hint(self, pos):
+        here = self.distance_to_goal(*pos)
+        if here <= 0:
+            return None
+        r, c = pos
+        for dr, dc, label in DIRECTIONS:
+            nr, nc = r + dr, c + dc
+            if self.is_open(nr, nc) and self.distance_to_goal(nr, nc) == here - 1:
+                return label
+        return None
+
+
+# --------------------------------------------------
+# Seeded generation (iterative randomised depth-first search)
+#
+# Rooms sit on even coordinates and passages are carved between them,
+# so every room is reachable from (0, 0). For even sizes the spare last
+# row/column is opened at random next to rooms. The goal is the room
+# farthest from the start.
+# --------------------------------------------------
+def generate_maze(rows, cols, seed=None):
+    rng = random.Random(seed)
+    cells = bytearray(rows * cols)
+
+    def carve(r, c):
+        cells[r * cols + c] = 1
+
+    carve(0, 0)
+    stack = [(0, 0)]
+    while stack:
+        r, c = stack[-1]
+        neighbours = [
+            (r + 2 * dr, c + 2 * dc, dr, dc)
+            for dr, dc, _ in DIRECTIONS
+            if 0 <= r + 2 * dr < rows
+            and 0 <= c + 2 * dc < cols
+            and cells[(r + 2 * dr) * cols + c + 2 * dc] == 0
+        ]
+        if not neighbours:
+            stack.pop()
+            continue
+        nr, nc, dr, dc = rng.choice(neighbours)
+        carve(r + dr, c + dc)
+        carve(nr, nc)
+        stack.append((nr, nc))
+
+    if rows % 2 == 0:
+        for c in range(0, cols, 2):
+            if rng.random() < 0.5:
+                carve(rows - 1, c)
+    if cols % 2 == 0:
+        for r in range(0, rows, 2):
+            if rng.random() < 0.5:
+                carve(r, cols - 1)
+
+    start = (0, 0)
+    from_start = Maze(rows, cols, cells, start, start).distance
+    far = max(range(rows * cols), key=from_start.__getitem__)
+    return Maze(rows, cols, cells, start, divmod(far, cols))
+
+
+# Mazes are immutable once built, so sessions share them per (size, seed)
+@functools.lru_cache(maxsize=256)
+def cached_maze(rows, cols, seed):
+    return generate_maze(rows, cols, seed)
@@ -0,0 +1,242 @@
+import functools
+
+import streamlit as st
+
+from games.maze import DIRECTIONS
+from games.maze_view import CHILD, PATH, WALL, cell_size, image_src
+
+# Move codes the browser reports, in DIRECTIONS order
+MOVE_CODES = ("U", "D", "L", "R")
+ARROW_KEYS = ("ArrowUp", "ArrowDown", "ArrowLeft", "ArrowRight")
+
+BLOCKED = "🚫 Can't go that way!"
+HINT = "💡 Try "
+
+CSS = """
+.maze-board {
+    position: relative;
+    display: grid;
+    margin: 0 auto 15px;
+    text-align: center;
+}
+.maze-sprite {
+    position: absolute;
+    background: #a5cad2;
+    transition: transform 0.08s linear;
+}
+.maze-sprite img {
+    object-fit: cover;
+    border-radius: 6px;
+    margin-top: 2px;
+}
+.maze-pad {
+    display: grid;
+    grid-template-columns: repeat(3, 1fr);
+    gap: 6px;
+    max-width: 420px;
+    margin: 0 auto;
+}
+.maze-pad button {
+    border-radius: 10px;
+    padding: 8px;
+    font-size: 15px;
+    cursor: pointer;
+}
+.maze-message {
+    min-height: 1.5em;
+    margin: 8px auto;
+    text-align: center;
+}
+"""
+
+# Walls, moves and hints all run here; the server only hears about
+# the game once, when the child reaches the target ("finished" with
+# the moves as a string of U/D/L/R).
+JS = """
+export default function (component) {
+    const { data, parentElement, setTriggerValue } = component;
+    const root = parentElement.querySelector(".maze-root");
+    if (!data || !root) {
+        return;
+    }
+
+    const { rows, cols, cells, distance, size, moves: MOVES } = data;
+    const isOpen = (r, c) =>
+        r >= 0 && r < rows && c >= 0 && c < cols && cells[r * cols + c] === "1";
+
+    // One game per mount; progress survives a re-render of the same game
+    let state = root.mazeState;
+    if (!state || state.id !== data.id) {
+        state = { id: data.id, pos: data.start.slice(), path: "", done: false };
+        root.mazeState = state;
+        build();
+    }
+    place();
+
+    function el(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text) node.textContent = text;
+        return node;
+    }
+
+    function sprite(pos) {
+        const node = el("div", "maze-sprite");
+        node.style.width = node.style.height = size + "px";
+        node.style.top = pos[0] * size + "px";
+        node.style.left = pos[1] * size + "px";
+        return node;
+    }
+
+    function build() {
+        root.replaceChildren();
+        const board = el("div", "maze-board");
+        board.style.gridTemplateColumns = `repeat(${cols}, ${size}px)`;
+        board.style.gridAutoRows = size + "px";
+        board.style.width = cols * size + "px";
+        board.style.fontSize = Math.floor(size * 0.6) + "px";
+        board.style.lineHeight = size + "px";
+        for (const cell of cells) {
+            board.appendChild(el("div", "", cell === "1" ? data.path : data.wall));
+        }
+
+        const target = sprite(data.goal);
+        if (data.photo) {
+            const img = el("img");
+            img.src = data.photo;
+            img.style.width = img.style.height = size - 4 + "px";
+            target.appendChild(img);
+        } else {
+            target.textContent = "🎯";
+        }
+        board.appendChild(target);
+
+        const child = sprite(data.start);
+        child.style.top = child.style.left = "0px";
+        child.textContent = data.child;
+        board.appendChild(child);
+
+        const pad = el("div", "maze-pad");
+        for (const [slot, index] of [[1, 0], [3, 2], [5, 3], [7, 1]]) {
+            const button = el("button", "", MOVES[index][2]);
+            button.style.gridColumn = (slot % 3) + 1;
+            button.style.gridRow = Math.floor(slot / 3) + 1;
+            button.onclick = () => move(MOVES[index]);
+            pad.appendChild(button);
+        }
+        const hint = el("button", "", "💡 Hint");
+        hint.style.gridColumn = 3;
+        hint.style.gridRow = 3;
+        hint.onclick = showHint;
+        pad.appendChild(hint);
+
+        root.append(board, el("div", "maze-message"), pad);
+        state.child = child;
+    }
+
+    function say(text) {
+        root.querySelector(".maze-message").textContent = text;
+    }
+
+    function place() {
+        const [r, c] = state.pos;
+        state.child.style.transform = `translate(${c * size}px, ${r * size}px)`;
+        state.child.style.visibility = state.done ? "hidden" : "visible";
+    }
+
+    function move([dr, dc, , code]) {
+        if (state.done) return;
+        const r = state.pos[0] + dr;
+        const c = state.pos[1] + dc;
+        if (!isOpen(r, c)) {
+            say(data.blocked);
+            return;
+        }
+        state.pos = [r, c];
+        state.path += code;
+        state.done = r === data.goal[0] && c === data.goal[1];
+        say("");
+        place();
+        if (state.done) {
+            setTriggerValue("finished", state.path);
+        }
+    }
+
+    function showHint() {
+        const [r, c] = state.pos;
+        const here = distance[r * cols + c];
+        if (state.done || here <= 0) return;
+        for (const step of MOVES) {
+            const nr = r + step[0];
+            const nc = c + step[1];
+            if (isOpen(nr, nc) && distance[nr * cols + nc] === here - 1) {
+                say(data.hint + step[2]);
+                return;
+            }
+        }
+    }
+
+    function onKey(event) {
+        const target = event.target;
+        if (target && (target.isContentEditable || /^(INPUT|TEXTAREA|SELECT)$/.test(target.tagName))) {
+            return;
+        }
+        const step = MOVES.find((m) => m[4] === event.key);
+        if (step && root.isConnected) {
+            event.preventDefault();
+            move(step);
+        }
+    }
+
+    document.addEventListener("keydown", onKey);
+    return () => document.removeEventListener("keydown", onKey);
+}
+"""
+
+_component = st.components.v2.component(
+    "maze_board",
+    html="<div class='maze-root'></div>",
+    css=CSS,
+    js=JS,
+)
+
+
+# --------------------------------------------------
+# Everything the browser needs to play one maze, built once per maze
+# (mazes are shared immutable objects, like the static board layer)
+# --------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def maze_definition(maze):
+    return {
+        "rows": maze.rows,
+        "cols": maze.cols,
+        "cells": "".join("1" if v else "0" for v in maze.cells),
+        "distance": list(maze.distance),
+        "start": list(maze.start),
+        "goal": list(maze.goal),
+        "size": cell_size(maze.rows, maze.cols),
+        "moves": [
+            [dr, dc, label, code, key]
+            for (dr, dc, label), code, key in zip(DIRECTIONS, MOVE_CODES, ARROW_KEYS)
+        ],
+        "child": CHILD,
+        "path": PATH,
+        "wall": WALL,
+        "blocked": BLOCKED,
+        "hint": HINT,
+    }
+
+
+# --------------------------------------------------
+# Mount the board for one game. `game_id` must change with every new
+# game. Returns the finished path (U/D/L/R string) on the rerun where
+# the child reaches the target, else None.
+# --------------------------------------------------
+def maze_board(maze, game_id, target_photo=None):
+    data = dict(maze_definition(maze), id=game_id, photo=image_src(target_photo))
+    result = _component(
+        key=f"maze_board_{game_id}",
+        data=data,
+        on_finished_change=lambda: None,
+    )
+    return result.finished
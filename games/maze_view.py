@@ -0,0 +1,73 @@
+import base64
+import functools
+
+CHILD = "👶"
+PATH = "🟣"
+WALL = "⬛"
+
+MAX_BOARD_PX = 420
+
+
+def cell_size(rows, cols):
+    return max(10, min(64, MAX_BOARD_PX // max(rows, cols)))
+
+
+# --------------------------------------------------
+# Static layer: walls and paths for one maze, built once.
+# Mazes are shared immutable objects, so they are the cache key.
+# --------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def _static_board(maze):
+    rows, cols = maze.rows, maze.cols
+    size = cell_size(rows, cols)
+    cells = "".join(f"<div>{PATH if v else WALL}</div>" for v in maze.cells)
+    return (
+        f"<div style='position:relative;display:grid;"
+        f"grid-template-columns:repeat({cols},{size}px);"
+        f"grid-auto-rows:{size}px;font-size:{int(size * 0.6)}px;"
+        f"line-height:{size}px;text-align:center;margin:0 auto 15px;"
+        f"width:{cols * size}px'>"
+        f"{cells}"
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _data_uri(payload):
+    return "data:image/jpeg;base64," + base64.b64encode(payload).decode("ascii")
+
+
+# A media URL, or JPEG bytes inlined as a data URI
+def image_src(photo):
+    if not photo:
+        return None
+    return photo if isinstance(photo, str) else _data_uri(photo)
+
+
+def _sprite(pos, size, content):
+    r, c = pos
+    return (
+        f"<div style='position:absolute;top:{r * size}px;left:{c * size}px;"
+        f"width:{size}px;height:{size}px;background:#a5cad2'>{content}</div>"
+    )
+
+
+# --------------------------------------------------
+# Whole board as one HTML block: the cached static layer plus
+# the child and target sprites positioned on top of it.
+# --------------------------------------------------
+def render_maze(maze, pos, target_photo=None):
+    size = cell_size(maze.rows, maze.cols)
+
+    if target_photo:
+        target = (
+            f"<img src='{image_src(target_photo)}' "
+            f"style='width:{size - 4}px;height:{size - 4}px;"
+            f"object-fit:cover;border-radius:6px;margin-top:2px'>"
+        )
+    else:
+        target = "🎯"
+
+    sprites = _sprite(maze.goal, size, target)
+    if pos != maze.goal:
+        sprites += _sprite(pos, size, CHILD)
+    return _static_board(maze) + sprites + "</div>"
@@ -1,141 +1,52 @@
 import streamlit as st
-import json
-import os
-import random
-from PIL import Image
-
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-
-# ================= UI ENHANCEMENT ONLY =================
-st.markdown("""
-<style>
-    /* Full app background */
-    body {
-        background-color: #a5cad2;
-    }
-
-    /* Streamlit app container */
-    .stApp {
-        background-color: #a5cad2;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-    .main {
-        background-color: #ff7b89;
-    }
-    .card {
-        background-color: white;
-        padding: 18px;
-        border-radius: 16px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        margin-bottom: 15px;
-        text-align: center;
-    }
-    .name-card {
-        padding: 10px;
-        border-radius: 10px;
-        margin-bottom: 8px;
-    }
-    .selected {
-        background-color: #e0f0ff;
-        border: 2px solid #4da6ff;
-    }
-    .matched {
-        background-color: #e6ffea;
-        border: 2px solid #5cb85c;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 10px;
-        padding: 8px;
-        font-size: 15px;
-    }
-</style>
-""", unsafe_allow_html=True)
-# ======================================================
+
+from games.engine import MatchingGame, INTRO, DONE
+from utils.family_repository import load_family_data, get_member
+from utils.media_view import show_photo
+from utils.member_grid import member_grid
+from utils.prefetch import PREFETCH_LIMIT, prefetch_media
+from utils.reruns import fragment, rerun_fragment
+
+# Pairs on the board at once; the family is played in batches of this
+BATCH_SIZES = (4, 6, 8, 12)
+BATCH_SIZE = 6
 
 # --------------------------------------------------
-# Load family data
+# Warm the photos of the next batch (or of the next game's first
+# batch), in the order they will be shown
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+def prefetch_next_round(game):
+    keys = game.next_batch() if game.stage != INTRO else []
+    if not keys and game.upcoming:
+        keys = game.upcoming[0][1]
+    photos = [m for m in map(get_member, keys[:PREFETCH_LIMIT]) if m]
+    prefetch_media(
+        ("meet", tuple(member["id"] for member in photos)),
+        images=[(member["image"], 160) for member in photos],
+    )
 
 # --------------------------------------------------
-# Meet My Family Game Screen
+# Matching board: names, photos, feedback and the end of the game.
+# A fragment, so a click only reruns the board.
 # --------------------------------------------------
-def meet_my_family_screen(go_to):
-
-    st.title("👨‍👩‍👧 Meet My Family")
-    st.write("First, look at your family members. Then play the matching game 💙")
-    st.markdown("---")
-
-    family = load_family_data()
-
-    if not family:
-        st.warning("No family members found. Please complete Family Setup first.")
-        if st.button("⬅ Back to Setup"):
-            go_to("setup")
-        return
-
-    # --------------------------------------------------
-    # Step 1: Familiarization View
-    # --------------------------------------------------
-    if "start_game" not in st.session_state:
-        st.session_state.start_game = False
-
-    if not st.session_state.start_game:
-        st.subheader("📸 My Family")
-
-        cols = st.columns(3)
-        for idx, member in enumerate(family):
-            with cols[idx % 3]:
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-
-                img_path = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img_path):
-                    st.image(Image.open(img_path), width=140)
-
-                st.markdown(f"**{member['name']}**")
-                st.caption(member["relationship"])
-
-                st.markdown("</div>", unsafe_allow_html=True)
-
-        st.markdown("---")
-        if st.button("▶ Start Game"):
-            st.session_state.start_game = True
-            st.session_state.selected_name = None
-            st.session_state.matched = []
-            st.session_state.message = ""
-            st.session_state.shuffled_names = random.sample(
-                [m["name"] for m in family], len(family)
-            )
-            st.session_state.shuffled_photos = random.sample(
-                family, len(family)
-            )
-            st.rerun()
-
-        if st.button("⬅ Back to Home"):
-            go_to("home")
-
-        return
-
-    # --------------------------------------------------
-    # Step 2: Matching Game
-    # --------------------------------------------------
-    st.subheader("🎮 Match the Name to the Photo")
-
-    if "selected_name" not in st.session_state:
-        st.session_state.selected_name = None
-
-    if "matched" not in st.session_state:
-        st.session_state.matched = []
+@fragment
+def matching_board():
+    game = st.session_state.meet_game
+    # Members deleted since the game started would leave a batch
+    # unfinishable
+    missing = [
+        k for names, _ in game.batches for k in names if get_member(k) is None
+    ]
+    if missing:
+        game.drop(missing)
+    # The next batch may have just been loaded
+    prefetch_next_round(game)
+
+    if len(game.batches) > 1:
+        st.progress(
+            len(game.matched) / game.total,
+            text=f"Round {game.batch + 1} of {len(game.batches)}",
+        )
 
     col1, col2 = st.columns([1, 2])
 
@@ -145,25 +56,28 @@ def meet_my_family_screen(go_to):
     with col1:
         st.markdown("### 🏷 Names")
 
-        for name in st.session_state.shuffled_names:
+        for member_id in game.names:
+            member = get_member(member_id)
+            if member is None:
+                continue
+            name = member["name"]
 
-            if name in st.session_state.matched:
+            if member_id in game.matched:
                 st.markdown(
                     f"<div class='name-card matched'>✔ {name}</div>",
                     unsafe_allow_html=True
                 )
 
-            elif st.session_state.selected_name == name:
+            elif game.selected == member_id:
                 st.markdown(
                     f"<div class='name-card selected'>👉 {name}</div>",
                     unsafe_allow_html=True
                 )
 
             else:
-                if st.button(name, key=f"name_{name}"):
-                    st.session_state.selected_name = name
-                    st.session_state.message = ""
-                    st.rerun()
+                if st.button(name, key=f"name_{member_id}"):
+                    game.select_name(member_id)
+                    rerun_fragment()
 
     # -----------------------
     # Right: Photos
@@ -172,66 +86,114 @@ def meet_my_family_screen(go_to):
         st.markdown("### 🖼 Photos")
 
         cols = st.columns(2)
-        for idx, member in enumerate(st.session_state.shuffled_photos):
+        for idx, member_id in enumerate(game.photos):
+            member = get_member(member_id)
+            if member is None:
+                continue
             with cols[idx % 2]:
                 st.markdown("<div class='card'>", unsafe_allow_html=True)
 
-                img_path = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img_path):
-                    st.image(Image.open(img_path), width=160)
+                show_photo(member["image"], 160)
 
-                if member["name"] in st.session_state.matched:
+                if member_id in game.matched:
                     st.success("Matched ✅")
 
                 else:
-                    if st.button("Select Photo", key=f"photo_{member['name']}"):
-                        if st.session_state.selected_name == member["name"]:
-                            st.session_state.matched.append(member["name"])
-                            st.session_state.message = "Correct! 🎉"
-                        else:
-                            st.session_state.message = "Try again 🙂"
-
-                        st.session_state.selected_name = None
-                        st.rerun()
+                    if st.button("Select Photo", key=f"photo_{member_id}"):
+                        game.select_photo(member_id)
+                        rerun_fragment()
 
                 st.markdown("</div>", unsafe_allow_html=True)
 
     # -----------------------
     # Feedback Message
     # -----------------------
-    if st.session_state.message:
-        st.info(st.session_state.message)
+    if game.message:
+        st.info(game.message)
 
     # --------------------------------------------------
     # Completion
     # --------------------------------------------------
-    if len(st.session_state.matched) == len(family):
+    if game.stage == DONE:
         st.balloons()
         st.success("🎉 Great job! You matched everyone!")
 
         if st.button("🔁 Play Again"):
-            for key in [
-                "start_game",
-                "shuffled_names",
-                "shuffled_photos",
-                "matched",
-                "selected_name",
-                "message",
-            ]:
-                if key in st.session_state:
-                    del st.session_state[key]
+            game.start([m["id"] for m in load_family_data()], batch_size=game.batch_size)
+            rerun_fragment()
+
+# --------------------------------------------------
+# Meet My Family Game Screen
+# --------------------------------------------------
+def meet_my_family_screen(go_to):
+
+    st.title("👨‍👩‍👧 Meet My Family")
+    st.write("First, look at your family members. Then play the matching game 💙")
+    st.markdown("---")
+
+    family = load_family_data()
+
+    if not family:
+        st.warning("No family members found. Please complete Family Setup first.")
+        if st.button("⬅ Back to Setup"):
+            go_to("setup")
+        return
+
+    if "meet_game" not in st.session_state:
+        st.session_state.meet_game = MatchingGame()
+
+    game = st.session_state.meet_game
+    member_ids = [m["id"] for m in family]
+
+    if game.upcoming is None:
+        game.plan_round(member_ids, batch_size=BATCH_SIZE)
+    prefetch_next_round(game)
+
+    # --------------------------------------------------
+    # Step 1: Familiarization View
+    # --------------------------------------------------
+    if game.stage == INTRO:
+        st.subheader("📸 My Family")
+
+        def family_card(member):
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+
+            show_photo(member["image"], 140)
+
+            st.markdown(f"**{member['name']}**")
+            st.caption(member["relationship"])
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        member_grid(family, "meet_grid", family_card)
+
+        st.markdown("---")
+        batch_size = game.batch_size or BATCH_SIZE
+        if len(family) > BATCH_SIZES[0]:
+            batch_size = st.selectbox(
+                "Pairs per round",
+                BATCH_SIZES,
+                index=BATCH_SIZES.index(batch_size),
+                key="meet_batch_size",
+            )
+
+        if st.button("▶ Start Game"):
+            game.start(member_ids, batch_size=batch_size)
             st.rerun()
 
+        if st.button("⬅ Back to Home"):
+            go_to("home")
+
+        return
+
+    # --------------------------------------------------
+    # Step 2: Matching Game
+    # --------------------------------------------------
+    st.subheader("🎮 Match the Name to the Photo")
+
+    matching_board()
+
     st.markdown("---")
     if st.button("⬅ Back to Home"):
-        for key in [
-            "start_game",
-            "shuffled_names",
-            "shuffled_photos",
-            "matched",
-            "selected_name",
-            "message",
-        ]:
-            if key in st.session_state:
-                del st.session_state[key]
+        del st.session_state.meet_game
         go_to("home")
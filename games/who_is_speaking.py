@@ -1,78 +1,58 @@
 import streamlit as st
-import json
 import os
-import random
-from PIL import Image
-
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-AUDIO_FOLDER = "data/audio"
-
-# ================= UI ENHANCEMENT ONLY =================
-st.markdown("""
-<style>
-    /* Full app background */
-    body {
-        background-color: #a5cad2;
-    }
-
-    /* Streamlit app container */
-    .stApp {
-        background-color: #a5cad2;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-    .main {
-        background-color: #8a5082;
-    }
-    .card {
-        background-color: white;
-        padding: 18px;
-        border-radius: 16px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        margin-bottom: 15px;
-        text-align: center;
-    }
-    .option-card {
-        background-color: #ffffff;
-        padding: 15px;
-        border-radius: 14px;
-        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
-        text-align: center;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 10px;
-        padding: 8px;
-        font-size: 15px;
-    }
-</style>
-""", unsafe_allow_html=True)
-# ======================================================
+
+from games.engine import RecallScheduler, VoiceQuiz, INTRO
+from utils.family_repository import get_member, member_ids_with_audio
+from utils.media_store import audio_path
+from utils.media_view import play_voice, show_photo
+from utils.member_grid import member_grid
+from utils.prefetch import prefetch_media
+from utils.reruns import fragment
 
 # --------------------------------------------------
-# Load family data
+# Reset game state (the child's recall history is kept)
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+def reset_who_speaking():
+    st.session_state.pop("ws_game", None)
 
 # --------------------------------------------------
-# Reset game state
+# Warm the next round's voice and option photos
 # --------------------------------------------------
-def reset_who_speaking():
-    for key in [
-        "ws_stage",
-        "ws_target",
-        "ws_options",
-    ]:
-        if key in st.session_state:
-            del st.session_state[key]
+def prefetch_next_round(game):
+    target_id, option_ids = game.upcoming
+    options = [get_member(i) for i in option_ids]
+    target = get_member(target_id)
+    if target is None or None in options:
+        return
+    prefetch_media(
+        ("who", target_id, tuple(option_ids)),
+        images=[(member["image"], 140) for member in options],
+        audio=[target["audio"]],
+    )
+
+# --------------------------------------------------
+# The answer buttons: a fragment, so an answer only reruns this row
+# and the voice player above keeps playing
+# --------------------------------------------------
+@fragment
+def option_row(options):
+    game = st.session_state.ws_game
+    cols = st.columns(len(options))
+
+    for idx, member in enumerate(options):
+        with cols[idx]:
+            st.markdown("<div class='option-card'>", unsafe_allow_html=True)
+
+            show_photo(member["image"], 140)
+
+            if st.button(member["name"], key=f"choose_{member['id']}"):
+                if game.choose(member["id"]):
+                    st.balloons()
+                    st.success("🎉 Correct! Great listening!")
+                else:
+                    st.warning("❌ Try again 🙂")
+
+            st.markdown("</div>", unsafe_allow_html=True)
 
 # --------------------------------------------------
 # Who Is Speaking Game
@@ -83,12 +63,10 @@ def who_is_speaking_screen(go_to):
     st.write("Listen carefully and find whose voice it is 💙")
     st.markdown("---")
 
-    family = load_family_data()
-
-    # Filter only members with audio
-    family_with_audio = [m for m in family if m.get("audio")]
+    # Ids of members with audio, indexed by the repository
+    audio_ids = member_ids_with_audio()
 
-    if len(family_with_audio) < 2:
+    if len(audio_ids) < 2:
         st.warning("Please add at least 2 family members with voice recordings.")
         if st.button("⬅ Back to Setup"):
             go_to("setup")
@@ -97,37 +75,43 @@ def who_is_speaking_screen(go_to):
     # --------------------------------------------------
     # Stage handling
     # --------------------------------------------------
-    if "ws_stage" not in st.session_state:
-        st.session_state.ws_stage = "intro"
+    if "ws_recall" not in st.session_state:
+        st.session_state.ws_recall = RecallScheduler()
+
+    if "ws_game" not in st.session_state:
+        st.session_state.ws_game = VoiceQuiz(st.session_state.ws_recall)
+
+    game = st.session_state.ws_game
 
     # --------------------------------------------------
     # STAGE 1: Familiarization
     # --------------------------------------------------
-    if st.session_state.ws_stage == "intro":
+    if game.stage == INTRO:
         st.subheader("👨‍👩‍👧 Listen to Your Family")
 
-        cols = st.columns(3)
-        for idx, member in enumerate(family_with_audio):
-            with cols[idx % 3]:
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
+        if game.upcoming is None:
+            game.plan_round(audio_ids)
+        prefetch_next_round(game)
 
-                img = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img):
-                    st.image(Image.open(img), width=140)
+        def family_card(member):
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
 
-                st.markdown(f"**{member['name']}**")
-                st.write(member["relationship"])
+            show_photo(member["image"], 140)
 
-                audio = os.path.join(AUDIO_FOLDER, member["audio"])
-                if os.path.exists(audio):
-                    st.audio(audio)
+            st.markdown(f"**{member['name']}**")
+            st.write(member["relationship"])
 
-                st.markdown("</div>", unsafe_allow_html=True)
+            if os.path.exists(audio_path(member["audio"])):
+                play_voice(member["audio"])
+
+            st.markdown("</div>", unsafe_allow_html=True)
+
+        member_grid([get_member(i) for i in audio_ids], "ws_grid", family_card)
 
         st.markdown("---")
 
         if st.button("▶ Start Game"):
-            st.session_state.ws_stage = "game"
+            game.new_round(audio_ids)
             st.rerun()
 
         if st.button("⬅ Back to Home"):
@@ -138,48 +122,28 @@ def who_is_speaking_screen(go_to):
     # --------------------------------------------------
     # STAGE 2: Game Mode
     # --------------------------------------------------
-    if "ws_target" not in st.session_state:
-        st.session_state.ws_target = random.choice(family_with_audio)
-
-        options = family_with_audio.copy()
-        random.shuffle(options)
-        st.session_state.ws_options = options[:3]
-
-        if st.session_state.ws_target not in st.session_state.ws_options:
-            st.session_state.ws_options[-1] = st.session_state.ws_target
-            random.shuffle(st.session_state.ws_options)
-
-    target = st.session_state.ws_target
+    target = get_member(game.target)
+    options = [get_member(i) for i in game.options]
+    if target is None or None in options:
+        # Someone in this round was removed meanwhile
+        game.new_round(audio_ids)
+        st.rerun()
 
     st.subheader("🎧 Whose voice is this?")
-    st.audio(os.path.join(AUDIO_FOLDER, target["audio"]))
+    play_voice(target["audio"])
     st.markdown("🔁 You can replay the voice as many times as you want")
 
     st.markdown("---")
 
-    cols = st.columns(len(st.session_state.ws_options))
-
-    for idx, member in enumerate(st.session_state.ws_options):
-        with cols[idx]:
-            st.markdown("<div class='option-card'>", unsafe_allow_html=True)
-
-            img = os.path.join(IMAGE_FOLDER, member["image"])
-            if os.path.exists(img):
-                st.image(Image.open(img), width=140)
-
-            if st.button(member["name"], key=f"choose_{member['name']}"):
-                if member == target:
-                    st.balloons()
-                    st.success("🎉 Correct! Great listening!")
-                else:
-                    st.warning("❌ Try again 🙂")
-
-            st.markdown("</div>", unsafe_allow_html=True)
+    option_row(options)
 
     st.markdown("---")
 
+    # The next round is already picked and warming up
+    prefetch_next_round(game)
+
     if st.button("🔁 Play Again"):
-        reset_who_speaking()
+        game.new_round(audio_ids)
         st.rerun()
 
     if st.button("⬅ Back to Home"):
@@ -1,55 +1,27 @@
 import streamlit as st
-import json
 import os
-from PIL import Image
 
-DATA_FILE = "data/family_data.json"
-IMAGE_FOLDER = "data/images"
-AUDIO_FOLDER = "data/audio"
-
-# --------------------------------------------------
-# UI ENHANCEMENT (SAFE – NO LOGIC CHANGE)
-# --------------------------------------------------
-st.markdown("""
-<style>
-    /* Full app background */
-    body {
-        background-color: #a5cad2;
-    }
-
-    /* Streamlit app container */
-    .stApp {
-        background-color: #a5cad2;
-    }
-</style>
-""", unsafe_allow_html=True)
-st.markdown("""
-<style>
-    .main {
-        background-color: #758eb7;
-    }
-    .card {
-        background-color: white;
-        padding: 25px;
-        border-radius: 16px;
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        margin-bottom: 20px;
-    }
-    .member-card {
-        background-color: #ffffff;
-        padding: 15px;
-        border-radius: 14px;
-        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
-        text-align: center;
-    }
-    .stButton>button {
-        width: 100%;
-        border-radius: 10px;
-        padding: 8px;
-        font-size: 15px;
-    }
-</style>
-""", unsafe_allow_html=True)
+from utils.family_repository import (
+    load_family_data,
+    get_member,
+    add_family_member,
+    update_family_member,
+    delete_family_member,
+)
+from utils.helpers import IMAGE_FOLDER, AUDIO_FOLDER
+from utils.bulk import create_export, import_family
+from utils.jobs import PENDING, FAILED
+from utils.media_store import release, audio_path
+from utils.media_view import play_voice, show_photo
+from utils.member_grid import member_grid
+from utils.uploads import (
+    UploadError,
+    ingest_image,
+    ingest_audio,
+    ingest_member_media,
+    schedule_post_processing,
+    post_processing_status,
+)
 
 # --------------------------------------------------
 # Ensure folders exist
@@ -58,20 +30,134 @@ os.makedirs(IMAGE_FOLDER, exist_ok=True)
 os.makedirs(AUDIO_FOLDER, exist_ok=True)
 
 # --------------------------------------------------
-# Load existing family data
+# The session keeps the ids of the members it shows, in the order
+# they were added; records are always read from the repository
 # --------------------------------------------------
-def load_family_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+def session_members():
+    return [m for m in map(get_member, st.session_state.family_member_ids) if m]
+
+
+def forget_session_member(member_id):
+    ids = st.session_state.family_member_ids
+    if member_id in ids:
+        ids.remove(member_id)
+
 
 # --------------------------------------------------
-# Save family data
+# Edit one member (name, relationship, photo, voice)
 # --------------------------------------------------
-def save_family_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def edit_member_form(member):
+    member_id = member["id"]
+    with st.form(f"edit_member_form_{member_id}"):
+        name = st.text_input("Name", member["name"], key=f"edit_name_{member_id}")
+        relationship = st.text_input(
+            "Relationship", member["relationship"], key=f"edit_relationship_{member_id}"
+        )
+        image_file = st.file_uploader(
+            "Replace Photo",
+            type=["jpg", "jpeg", "png"],
+            key=f"edit_image_{member_id}"
+        )
+        audio_file = st.file_uploader(
+            "Replace Voice",
+            type=["mp3", "wav", "ogg"],
+            key=f"edit_audio_{member_id}"
+        )
+
+        if not st.form_submit_button("💾 Save"):
+            return
+
+    if not name or not relationship:
+        st.warning("Name and relationship cannot be empty.")
+        return
+
+    changes = {"name": name, "relationship": relationship}
+    try:
+        if image_file:
+            changes["image"] = ingest_image(image_file)
+        if audio_file:
+            changes["audio"] = ingest_audio(audio_file)
+    except UploadError as e:
+        if "image" in changes:
+            release(changes["image"])
+        st.warning(str(e))
+        return
+
+    # Single-record write; the old photo/voice is released by the
+    # repository's change listener once nothing points at it
+    updated = update_family_member(member_id, changes)
+
+    # Ingesting took a reference on each upload. Give it back when the
+    # member was deleted meanwhile, or when the same file was uploaded
+    # again (the listener only releases keys that changed).
+    for field in ("image", "audio"):
+        key = changes.get(field)
+        if key and (updated is None or key == member.get(field)):
+            release(key)
+            changes.pop(field)
+
+    if updated is None:
+        st.warning("This family member was removed in the meantime.")
+        return
+
+    schedule_post_processing(changes.get("image"), changes.get("audio"))
+    st.rerun()
+
+
+# --------------------------------------------------
+# Bulk import (ZIP + manifest) and export
+# --------------------------------------------------
+def bulk_section():
+    with st.expander("📦 Import / export many members"):
+        st.caption(
+            "ZIP with photos, optional voices and a manifest.csv or manifest.json "
+            "with the columns name, relationship, image, audio (paths inside the ZIP)."
+        )
+        archive_file = st.file_uploader(
+            "Family archive",
+            type=["zip"],
+            key=f"bulk_archive_{st.session_state.form_counter}"
+        )
+        manifest_file = st.file_uploader(
+            "Manifest (optional, if not inside the ZIP)",
+            type=["csv", "json"],
+            key=f"bulk_manifest_{st.session_state.form_counter}"
+        )
+
+        if st.button("⬆ Import", disabled=archive_file is None):
+            bar = st.progress(0.0, text="Importing…")
+
+            def progress(done, total):
+                bar.progress(done / total if total else 1.0, text=f"Imported {done} of {total}")
+
+            try:
+                report = import_family(archive_file, manifest_file, progress)
+            except UploadError as e:
+                st.warning(str(e))
+            else:
+                st.session_state.family_member_ids.extend(m["id"] for m in report.added)
+                st.success(f"{len(report.added)} member(s) imported.")
+                if report.errors:
+                    st.warning(
+                        f"{len(report.errors)} row(s) skipped:\n\n"
+                        + "\n".join(f"- {error}" for error in report.errors[:20])
+                    )
+
+        st.markdown("---")
+        if st.button("📦 Prepare export"):
+            st.session_state.export_path = create_export()
+
+        export_path = st.session_state.get("export_path")
+        if export_path and os.path.exists(export_path):
+            with open(export_path, "rb") as f:
+                st.download_button(
+                    "⬇ Download family archive",
+                    f,
+                    file_name="family.zip",
+                    mime="application/zip",
+                    on_click="ignore",
+                )
+
 
 # --------------------------------------------------
 # Family Setup Screen
@@ -83,8 +169,8 @@ def family_setup_screen(go_to):
     st.markdown("---")
 
     # Initialize family members
-    if "family_members" not in st.session_state:
-        st.session_state.family_members = load_family_data()
+    if "family_member_ids" not in st.session_state:
+        st.session_state.family_member_ids = [m["id"] for m in load_family_data()]
 
     # Form reset key
     if "form_counter" not in st.session_state:
@@ -114,65 +200,70 @@ def family_setup_screen(go_to):
             if not name or not relationship or not image_file:
                 st.warning("Please enter name, relationship, and upload photo.")
             else:
-                # Save image
-                image_path = os.path.join(IMAGE_FOLDER, image_file.name)
-                with open(image_path, "wb") as f:
-                    f.write(image_file.getbuffer())
-
-                # Save audio if provided
-                audio_filename = None
-                if audio_file:
-                    audio_filename = audio_file.name
-                    audio_path = os.path.join(AUDIO_FOLDER, audio_filename)
-                    with open(audio_path, "wb") as f:
-                        f.write(audio_file.getbuffer())
-
-                # Add member
-                st.session_state.family_members.append({
-                    "name": name,
-                    "relationship": relationship,
-                    "image": image_file.name,
-                    "audio": audio_filename
-                })
-
-                save_family_data(st.session_state.family_members)
-                st.success(f"{name} added successfully!")
-
-                # RESET FORM + REFRESH UI
-                st.session_state.form_counter += 1
-                st.rerun()
+                try:
+                    # Save photo and voice (streamed, stored once per content)
+                    image_key, audio_key = ingest_member_media(image_file, audio_file)
+                except UploadError as e:
+                    st.warning(str(e))
+                else:
+                    # Thumbnails and audio normalisation run in the background
+                    schedule_post_processing(image_key, audio_key)
+
+                    # Add member (single-record write)
+                    member = add_family_member({
+                        "name": name,
+                        "relationship": relationship,
+                        "image": image_key,
+                        "audio": audio_key
+                    })
+                    st.session_state.family_member_ids.append(member["id"])
+
+                    st.success(f"{name} added successfully!")
+
+                    # RESET FORM + REFRESH UI
+                    st.session_state.form_counter += 1
+                    st.rerun()
 
     st.markdown("</div>", unsafe_allow_html=True)
 
+    bulk_section()
+
     # -------------------------------
     # Display Added Members
     # -------------------------------
-    if st.session_state.family_members:
+    members = session_members()
+    if members:
         st.subheader("👨‍👩‍👧 Added Family Members")
 
-        cols = st.columns(3)
-        for idx, member in enumerate(st.session_state.family_members):
-            with cols[idx % 3]:
-                st.markdown("<div class='member-card'>", unsafe_allow_html=True)
+        def member_card(member):
+            st.markdown("<div class='member-card'>", unsafe_allow_html=True)
 
-                img_path = os.path.join(IMAGE_FOLDER, member["image"])
-                if os.path.exists(img_path):
-                    st.image(Image.open(img_path), width=140)
+            show_photo(member["image"], 140)
 
-                st.markdown(f"**{member['name']}**")
-                st.write(member["relationship"])
+            st.markdown(f"**{member['name']}**")
+            st.write(member["relationship"])
 
-                if member.get("audio"):
-                    audio_path = os.path.join(AUDIO_FOLDER, member["audio"])
-                    if os.path.exists(audio_path):
-                        st.audio(audio_path)
+            status = post_processing_status(member)
+            if status == PENDING:
+                st.caption("⏳ Preparing media…")
+            elif status == FAILED:
+                st.caption("⚠️ Media could not be processed")
 
-                if st.button("🗑️ Delete", key=f"delete_{idx}"):
-                    st.session_state.family_members.pop(idx)
-                    save_family_data(st.session_state.family_members)
-                    st.rerun()
+            if member.get("audio"):
+                if os.path.exists(audio_path(member["audio"])):
+                    play_voice(member["audio"])
+
+            with st.expander("✏️ Edit"):
+                edit_member_form(member)
+
+            if st.button("🗑️ Delete", key=f"delete_{member['id']}"):
+                delete_family_member(member["id"])
+                forget_session_member(member["id"])
+                st.rerun()
+
+            st.markdown("</div>", unsafe_allow_html=True)
 
-                st.markdown("</div>", unsafe_allow_html=True)
+        member_grid(members, "setup_grid", member_card)
 
     st.markdown("---")
 
@@ -182,7 +273,7 @@ def family_setup_screen(go_to):
     col1, col2 = st.columns(2)
 
     with col1:
-        if st.session_state.family_members:
+        if members:
             if st.button("✅ Finish Setup"):
                 go_to("home")
                 st.rerun()
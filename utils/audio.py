@@ -0,0 +1,184 @@
+import os
+import shutil
+import subprocess
+import threading
+
+from utils.helpers import AUDIO_FOLDER, AUDIO_CACHE_FOLDER
+from utils.jobs import FAILED, media_jobs
+from utils.media_cache import audio_cache
+from utils.media_store import audio_path, extension_of
+from utils.metrics import count
+from utils.tenants import bind_current, current_tenant, tenant_path
+
+# ffmpeg does the decoding/encoding; without it the original files are served
+FFMPEG = os.environ.get("KMF_FFMPEG") or shutil.which("ffmpeg")
+
+# Mono 48 kbps MP3 plays everywhere and is a fraction of a WAV's size
+OUTPUT_ARGS = ["-ac", "1", "-ar", "22050", "-c:a", "libmp3lame", "-b:a", "48k"]
+
+# Trim leading/trailing silence, then normalise loudness to -16 LUFS
+TRIM_SILENCE = (
+    "silenceremove=start_periods=1:start_threshold=-50dB:start_silence=0.1"
+)
+AUDIO_FILTER = ",".join([
+    TRIM_SILENCE,
+    "areverse",
+    TRIM_SILENCE,
+    "areverse",
+    "loudnorm=I=-16:TP=-1.5:LRA=11",
+])
+
+AUDIO_MIME = {".mp3": "audio/mpeg", ".wav": "audio/wav", ".ogg": "audio/ogg"}
+
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+def normalized_path(key):
+    stem = key.replace(".", "_")
+    return os.path.join(tenant_path(AUDIO_CACHE_FOLDER), stem + ".mp3")
+
+
+def _is_fresh(output, source):
+    try:
+        return os.stat(output).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except OSError:
+        return False
+
+
+# --------------------------------------------------
+# Transcode + trim + loudness normalisation
+# --------------------------------------------------
+def normalize_audio(key):
+    if FFMPEG is None:
+        return None
+    source = audio_path(key)
+    output = normalized_path(key)
+    if _is_fresh(output, source):
+        return output
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    tmp_path = f"{output}.{threading.get_ident()}.tmp.mp3"
+    subprocess.run(
+        [FFMPEG, "-y", "-hide_banner", "-loglevel", "error", "-i", source,
+         "-af", AUDIO_FILTER, *OUTPUT_ARGS, tmp_path],
+        check=True,
+        capture_output=True,
+        timeout=120,
+    )
+    os.replace(tmp_path, output)
+    return output
+
+
+def remove_normalized(key):
+    try:
+        os.remove(normalized_path(key))
+    except FileNotFoundError:
+        pass
+    tenant = current_tenant()
+    audio_cache.discard(lambda k: k[0] == tenant and k[1] == key)
+
+
+def audio_job(key):
+    return ("audio", current_tenant(), key)
+
+
+# Source mtime each job was last submitted for. A FAILED job is not
+# queued again (three ffmpeg runs with backoff) until the recording
+# itself changes.
+_submitted_mtimes = {}
+_submitted_lock = threading.Lock()
+
+
+def schedule_normalization(key):
+    if FFMPEG is None:
+        return
+    try:
+        mtime = os.stat(audio_path(key)).st_mtime_ns
+    except OSError:
+        return
+    job = audio_job(key)
+    with _submitted_lock:
+        if (media_jobs.status(job) == FAILED
+                and _submitted_mtimes.get(job) == mtime):
+            return
+        _submitted_mtimes[job] = mtime
+    media_jobs.submit(job, bind_current(normalize_audio), key)
+
+
+# --------------------------------------------------
+# Path handed to st.audio
+#
+# Uses the normalised copy when it exists; otherwise serves the
+# original and queues the conversion, so older recordings are
+# backfilled the first time they are played.
+# --------------------------------------------------
+def playable_audio(key):
+    source = audio_path(key)
+    output = normalized_path(key)
+    if not _is_fresh(output, source):
+        schedule_normalization(key)
+        output = source
+    return output
+
+
+# --------------------------------------------------
+# Playable bytes + MIME type for st.audio, from the shared audio
+# cache. Keyed by (tenant, key, file, mtime) like thumbnails, so a
+# replay or a prefetched round does not read the disk again, and the
+# cache moves on to the normalised copy once it exists.
+# --------------------------------------------------
+def _read_bytes(path):
+    count("file_reads")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def load_audio(key):
+    path = playable_audio(key)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None
+    data = audio_cache.get_or_load(
+        (current_tenant(), key, path, mtime), lambda: _read_bytes(path)
+    )
+    if data:
+        count("audio_bytes_sent", len(data))
+    return data, AUDIO_MIME.get(extension_of(path), "audio/mpeg")
+
+
+# --------------------------------------------------
+# Backfill everything already in data/audio and the member records
+#
+#   python -m utils.audio
+# --------------------------------------------------
+def backfill_audio():
+    from utils.family_repository import load_family_data
+
+    keys = {m["audio"] for m in load_family_data() if m.get("audio")}
+    legacy_folder = tenant_path(AUDIO_FOLDER)
+    if os.path.isdir(legacy_folder):
+        keys.update(
+            name for name in os.listdir(legacy_folder)
+            if not name.startswith(".")
+        )
+
+    converted = failed = 0
+    for key in sorted(keys):
+        try:
+            if normalize_audio(key):
+                converted += 1
+        except (OSError, subprocess.SubprocessError):
+            failed += 1
+    return converted, failed
+
+
+if __name__ == "__main__":
+    if FFMPEG is None:
+        raise SystemExit("ffmpeg not found; install it or set KMF_FFMPEG.")
+    converted, failed = backfill_audio()
+    print(f"Normalised {converted} recording(s), {failed} failed.")
@@ -0,0 +1,296 @@
+import csv
+import io
+import json
+import os
+import posixpath
+import sys
+import tempfile
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+
+from utils.family_repository import add_family_members, load_family_data
+from utils.helpers import EXPORT_FOLDER
+from utils.media_store import audio_path, image_path, release
+from utils.storage import MEMBER_FIELDS
+from utils.tenants import bind_current, tenant_path
+from utils.uploads import UploadError, ingest_member_media, schedule_post_processing
+
+IMPORT_WORKERS = int(os.environ.get("KMF_IMPORT_WORKERS", str(os.cpu_count() or 2)))
+MAX_IMPORT_MEMBERS = 5000
+MAX_MANIFEST_BYTES = 5 * 1024 * 1024
+
+MANIFEST_NAMES = ("manifest.csv", "manifest.json")
+REQUIRED_FIELDS = ("name", "relationship", "image")
+
+# Exports older than this are removed when a new one is made
+EXPORT_MAX_AGE = 60 * 60
+
+ImportReport = namedtuple("ImportReport", "added errors")
+
+
+# --------------------------------------------------
+# Manifest: one row per member
+#
+#   name,relationship,image,audio
+#   Maria,Grandma,photos/maria.jpg,voices/maria.mp3
+#
+# or the same fields as a JSON list (optionally under "members").
+# image / audio are paths inside the ZIP, relative to the manifest.
+# --------------------------------------------------
+def _read_limited(stream):
+    data = stream.read(MAX_MANIFEST_BYTES + 1)
+    if len(data) > MAX_MANIFEST_BYTES:
+        raise UploadError(
+            f"Manifest is too large (limit {MAX_MANIFEST_BYTES // (1024 * 1024)} MB)."
+        )
+    return data.decode("utf-8-sig")
+
+
+def parse_manifest(stream, filename):
+    text = _read_limited(stream)
+    if filename.lower().endswith(".json"):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise UploadError(f"Manifest is not valid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get("members", [])
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise UploadError("JSON manifest must be a list of members.")
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+    rows = [
+        {
+            str(k).strip().lower(): str(v).strip()
+            for k, v in row.items()
+            if k is not None and v is not None
+        }
+        for row in rows
+    ]
+    if len(rows) > MAX_IMPORT_MEMBERS:
+        raise UploadError(f"Manifest lists more than {MAX_IMPORT_MEMBERS} members.")
+    return rows
+
+
+def _find_manifest(archive):
+    candidates = [
+        name for name in archive.namelist()
+        if posixpath.basename(name).lower() in MANIFEST_NAMES
+        and not name.startswith("__MACOSX/")
+    ]
+    if not candidates:
+        raise UploadError("No manifest.csv or manifest.json found in the archive.")
+    return min(candidates, key=len)
+
+
+def _archive_path(base, path):
+    return posixpath.normpath(posixpath.join(base, path.replace("\\", "/"))).lstrip("/")
+
+
+# --------------------------------------------------
+# Import
+#
+# Rows are checked up front, then every row's photo/voice is streamed
+# out of the ZIP through the normal upload validation on a thread pool.
+# All accepted members are written in one storage transaction, and
+# rows that fail are reported instead of aborting the import.
+# --------------------------------------------------
+def _check_row(row, archive, base):
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise UploadError(f"missing {', '.join(missing)}")
+    paths = {"image": _archive_path(base, row["image"])}
+    if row.get("audio"):
+        paths["audio"] = _archive_path(base, row["audio"])
+    for path in paths.values():
+        try:
+            archive.getinfo(path)
+        except KeyError:
+            raise UploadError(f"{path} is not in the archive")
+    return paths
+
+
+def _release_media(image_key, audio_key):
+    release(image_key)
+    if audio_key:
+        release(audio_key)
+
+
+def _ingest_row(archive, paths):
+    audio = paths.get("audio")
+    with archive.open(paths["image"]) as image_file, \
+            (archive.open(audio) if audio else nullcontext()) as audio_file:
+        return ingest_member_media(image_file, audio_file)
+
+
+def import_family(archive_file, manifest_file=None, progress=None):
+    try:
+        archive = zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise UploadError("The archive is not a valid ZIP file.")
+
+    with archive:
+        if manifest_file is not None:
+            base = ""
+            manifest_file.seek(0)
+            rows = parse_manifest(manifest_file, manifest_file.name)
+        else:
+            manifest = _find_manifest(archive)
+            base = posixpath.dirname(manifest)
+            with archive.open(manifest) as f:
+                rows = parse_manifest(f, manifest)
+
+        errors = []
+        pending = {}
+        for number, row in enumerate(rows, start=1):
+            try:
+                pending[number] = _check_row(row, archive, base)
+            except UploadError as e:
+                errors.append((number, str(e)))
+
+        total = len(pending)
+        futures = {}
+        media = {}
+        if progress:
+            progress(0, total)
+        try:
+            with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as pool:
+                futures = {
+                    pool.submit(bind_current(_ingest_row), archive, paths): number
+                    for number, paths in pending.items()
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    number = futures[future]
+                    try:
+                        media[number] = future.result()
+                    except Exception as e:
+                        # Encrypted entries, corrupt streams, bad media...
+                        errors.append((number, str(e) or type(e).__name__))
+                    if progress:
+                        progress(done, total)
+        except BaseException:
+            # The pool has finished every started row by now: release
+            # what they stored, collected or not
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    _release_media(*future.result())
+            raise
+
+    members = []
+    for number in sorted(media):
+        image_key, audio_key = media[number]
+        members.append({
+            "name": rows[number - 1]["name"],
+            "relationship": rows[number - 1]["relationship"],
+            "image": image_key,
+            "audio": audio_key,
+        })
+
+    try:
+        added = add_family_members(members) if members else []
+    except BaseException:
+        for member in members:
+            _release_media(member["image"], member["audio"])
+        raise
+
+    for member in added:
+        schedule_post_processing(member["image"], member["audio"], inline=False)
+
+    return ImportReport(added, [f"Row {n}: {error}" for n, error in sorted(errors)])
+
+
+# --------------------------------------------------
+# Export: manifest.csv + photos/ + voices/, re-importable as is.
+# Media is stored uncompressed (JPEG/PNG/MP3 are already compressed).
+# --------------------------------------------------
+def _media_entry(folder, key, path, written, archive):
+    arcname = f"{folder}/{key}"
+    if arcname not in written:
+        archive.write(path, arcname)
+        written.add(arcname)
+    return arcname
+
+
+def export_family(out):
+    exported = 0
+    written = set()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(MEMBER_FIELDS)
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as archive:
+        for member in load_family_data():
+            photo = image_path(member["image"])
+            if not os.path.exists(photo):
+                continue
+            image = _media_entry("photos", member["image"], photo, written, archive)
+
+            audio = ""
+            voice = audio_path(member["audio"]) if member.get("audio") else None
+            if voice and os.path.exists(voice):
+                audio = _media_entry("voices", member["audio"], voice, written, archive)
+
+            writer.writerow([member["name"], member["relationship"], image, audio])
+            exported += 1
+
+        archive.writestr("manifest.csv", manifest.getvalue())
+    return exported
+
+
+def _prune_exports(folder):
+    cutoff = time.time() - EXPORT_MAX_AGE
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# Writes a new export under the family's exports folder and returns its path
+def create_export():
+    folder = tenant_path(EXPORT_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    _prune_exports(folder)
+    fd, path = tempfile.mkstemp(dir=folder, prefix="family-", suffix=".zip")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            export_family(out)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+# --------------------------------------------------
+#   python -m utils.bulk import family.zip [manifest.csv]
+#   python -m utils.bulk export family.zip
+# --------------------------------------------------
+def main(argv):
+    if len(argv) >= 2 and argv[0] == "import":
+        manifest = open(argv[2], "rb") if len(argv) > 2 else None
+        try:
+            with open(argv[1], "rb") as archive_file:
+                report = import_family(archive_file, manifest)
+        finally:
+            if manifest:
+                manifest.close()
+        for error in report.errors:
+            print(error)
+        print(f"Imported {len(report.added)} member(s), {len(report.errors)} skipped.")
+        return 0
+    if len(argv) == 2 and argv[0] == "export":
+        with open(argv[1], "wb") as out:
+            print(f"Exported {export_family(out)} member(s) to {argv[1]}.")
+        return 0
+    print("usage: python -m utils.bulk import ARCHIVE [MANIFEST] | export ARCHIVE")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,180 @@
+import threading
+
+from utils.metrics import count, timer
+from utils.storage import create_storage
+from utils.tenants import current_tenant
+
+
+# --------------------------------------------------
+# Process-wide family data repository
+#
+# The loaded family list is shared by every session and only
+# re-read when the storage signature changes (file mtime/size for
+# JSON, a version counter for SQLite), so a normal rerun costs one
+# cheap check instead of a full parse.
+#
+# Writes go through the repository one member at a time (by id). When
+# nobody else wrote in between, the change is applied to the cached
+# copy in place of a reload, and every subscriber is told which member
+# changed so it can drop just that member's cached data.
+# --------------------------------------------------
+class FamilyRepository:
+
+    def __init__(self, storage, listeners=None):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._signature = None
+        self._members = ()
+        self._by_id = {}
+        self._audio_ids = ()
+        self._listeners = listeners if listeners is not None else []
+
+    def _refresh(self):
+        signature = self.storage.signature()
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            if signature == self._signature:
+                return
+
+            try:
+                with timer("family_load"):
+                    members = self.storage.load()
+                count("family_loads")
+            except (OSError, ValueError):
+                # Unreadable data: keep serving the last good copy
+                # and try again on the next call.
+                return
+
+            self._index(members, signature)
+
+    def _index(self, members, signature):
+        self._members = tuple(members)
+        self._by_id = {member["id"]: member for member in members}
+        self._audio_ids = tuple(member["id"] for member in members if member.get("audio"))
+        self._signature = signature
+
+    # changes all come from one storage write
+    def _apply(self, changes):
+        changes = [c for c in changes if c.old is not None or c.new is not None]
+        if not changes:
+            return
+        with self._lock:
+            if self._signature is None or changes[0].signature_before != self._signature:
+                # Stale cache or a concurrent writer: reload next time
+                self._signature = None
+            else:
+                members = list(self._members)
+                for change in changes:
+                    if change.old is None:
+                        members.append(change.new)
+                    elif change.new is None:
+                        members = [m for m in members if m["id"] != change.old["id"]]
+                    else:
+                        members = [
+                            change.new if m["id"] == change.new["id"] else m
+                            for m in members
+                        ]
+                self._index(members, changes[-1].signature_after)
+
+        for change in changes:
+            for listener in tuple(self._listeners):
+                listener(change)
+
+    def all(self):
+        self._refresh()
+        return self._members
+
+    def get(self, member_id):
+        self._refresh()
+        return self._by_id.get(member_id)
+
+    # Same tuple object until the family changes
+    def audio_ids(self):
+        self._refresh()
+        return self._audio_ids
+
+    def add_member(self, member):
+        change = self.storage.add_member(member)
+        self._apply([change])
+        return change.new
+
+    def add_members(self, members):
+        changes = self.storage.add_members(members)
+        self._apply(changes)
+        return [change.new for change in changes]
+
+    def update_member(self, member_id, changes):
+        change = self.storage.update_member(member_id, changes)
+        if change.old != change.new:
+            self._apply([change])
+        return change.new
+
+    def delete_member(self, member_id):
+        change = self.storage.delete_member(member_id)
+        self._apply([change])
+        return change.old
+
+
+# --------------------------------------------------
+# One repository (storage + indexes) per tenant, created on first use.
+# Change listeners are shared, and run on the writing thread with the
+# writer's tenant still bound.
+# --------------------------------------------------
+_repositories = {}
+_repositories_lock = threading.Lock()
+_listeners = []
+
+
+def _repository():
+    tenant = current_tenant()
+    repository = _repositories.get(tenant)
+    if repository is None:
+        with _repositories_lock:
+            repository = _repositories.get(tenant)
+            if repository is None:
+                repository = FamilyRepository(create_storage(), _listeners)
+                _repositories[tenant] = repository
+    return repository
+
+
+# --------------------------------------------------
+# Module-level helpers used by the screens
+# --------------------------------------------------
+def load_family_data():
+    return _repository().all()
+
+
+def has_family_data():
+    return len(_repository().all()) > 0
+
+
+def get_member(member_id):
+    return _repository().get(member_id)
+
+
+def member_ids_with_audio():
+    return _repository().audio_ids()
+
+
+def add_family_member(member):
+    return _repository().add_member(member)
+
+
+def add_family_members(members):
+    return _repository().add_members(members)
+
+
+def update_family_member(member_id, changes):
+    return _repository().update_member(member_id, changes)
+
+
+def delete_family_member(member_id):
+    return _repository().delete_member(member_id)
+
+
+# listener(change) runs after every add/update/delete made in this
+# process; change.old / change.new are the record before and after.
+def on_member_change(listener):
+    _listeners.append(listener)
@@ -1 +1,18 @@
-
+# --------------------------------------------------
+# Shared data locations (used by setup and all games)
+#
+# These are the default family's paths; per-family data resolves
+# them through utils.tenants.tenant_path(). Metrics are process-wide.
+# --------------------------------------------------
+DATA_FOLDER = "data"
+TENANTS_FOLDER = "data/tenants"
+DATA_FILE = "data/family_data.json"
+IMAGE_FOLDER = "data/images"
+AUDIO_FOLDER = "data/audio"
+THUMBNAIL_FOLDER = "data/thumbnails"
+DATABASE_FILE = "data/family_data.db"
+MEDIA_FOLDER = "data/media"
+AUDIO_CACHE_FOLDER = "data/audio_cache"
+METRICS_FILE = "data/metrics.jsonl"
+PROMETHEUS_FILE = "data/metrics.prom"
+EXPORT_FOLDER = "data/exports"
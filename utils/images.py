@@ -0,0 +1,150 @@
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+from utils.helpers import THUMBNAIL_FOLDER
+from utils.media_cache import image_cache
+from utils.media_store import image_path
+from utils.metrics import count, timer
+from utils.tenants import current_tenant, tenant_path
+
+# Fixed thumbnail widths (px). Screens ask for a display width and get
+# the smallest thumbnail that is at least that wide.
+THUMBNAIL_SIZES = (48, 120, 160)
+THUMBNAIL_QUALITY = 85
+
+_locks_guard = threading.Lock()
+_locks = {}
+
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+def original_path(filename):
+    return image_path(filename)
+
+
+def thumbnail_path(filename, size):
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(tenant_path(THUMBNAIL_FOLDER), str(size), stem + ".jpg")
+
+
+def pick_size(width):
+    for size in THUMBNAIL_SIZES:
+        if size >= width:
+            return size
+    return THUMBNAIL_SIZES[-1]
+
+
+def _lock_for(filename):
+    with _locks_guard:
+        return _locks.setdefault(filename, threading.Lock())
+
+
+# --------------------------------------------------
+# Thumbnail generation
+# --------------------------------------------------
+def _save_atomic(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    image.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    os.replace(tmp_path, path)
+
+
+def create_thumbnails(filename, sizes=THUMBNAIL_SIZES):
+    source = original_path(filename)
+    count("image_decodes")
+    with timer("thumbnail_generation"), Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # Shrink largest-first so each step resamples an already small image
+        for size in sorted(sizes, reverse=True):
+            if image.width > size:
+                height = max(1, round(image.height * size / image.width))
+                image = image.resize((size, height), Image.LANCZOS)
+            _save_atomic(image, thumbnail_path(filename, size))
+
+
+def _is_fresh(thumb, source):
+    try:
+        return os.stat(thumb).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except OSError:
+        return False
+
+
+# --------------------------------------------------
+# Lookup used by the screens
+#
+# Returns the thumbnail path for a display width (None if the photo
+# is missing or too large to decode). Photos uploaded before thumbnails existed are
+# backfilled on first use.
+# --------------------------------------------------
+def get_thumbnail(filename, width):
+    source = original_path(filename)
+    if not os.path.exists(source):
+        return None
+
+    size = pick_size(width)
+    thumb = thumbnail_path(filename, size)
+    if _is_fresh(thumb, source):
+        return thumb
+
+    with _lock_for(source):
+        if not _is_fresh(thumb, source):
+            try:
+                create_thumbnails(filename)
+            except Image.DecompressionBombError:
+                # Too many pixels to decode safely; never send the original
+                return None
+            except OSError:
+                # Not a readable image: fall back to the original file
+                return source
+    return thumb
+
+
+def _read_bytes(path):
+    count("file_reads")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# --------------------------------------------------
+# Encoded thumbnail bytes, served from the shared LRU cache.
+# Keyed by (tenant, filename, size, mtime) so a re-uploaded photo
+# never hits a stale entry; the tenant is also the cache partition.
+# --------------------------------------------------
+def load_thumbnail(filename, width):
+    thumb = get_thumbnail(filename, width)
+    if thumb is None:
+        return None
+    try:
+        mtime = os.stat(thumb).st_mtime_ns
+    except OSError:
+        return None
+    key = (current_tenant(), filename, pick_size(width), mtime)
+    with timer("image_load"):
+        payload = image_cache.get_or_load(key, lambda: _read_bytes(thumb))
+    if payload:
+        count("image_bytes_sent", len(payload))
+    return payload
+
+
+def remove_thumbnails(filename):
+    for size in THUMBNAIL_SIZES:
+        try:
+            os.remove(thumbnail_path(filename, size))
+        except FileNotFoundError:
+            pass
+    tenant = current_tenant()
+    image_cache.discard(lambda key: key[0] == tenant and key[1] == filename)
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+MEDIA_WORKERS = int(os.environ.get("KMF_MEDIA_WORKERS", str(os.cpu_count() or 2)))
+MEDIA_QUEUE_LIMIT = int(os.environ.get("KMF_MEDIA_QUEUE_LIMIT", "64"))
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+# --------------------------------------------------
+# Bounded background job queue
+#
+# Jobs are identified by a key so screens can ask for their status.
+# A failing job is retried with exponential backoff. When more than
+# max_pending jobs are waiting, submit() refuses new work and the
+# caller runs it inline instead (backpressure).
+#
+# Threads rather than processes: Pillow and ffmpeg release the GIL
+# for the heavy work, and jobs share the in-process caches.
+# --------------------------------------------------
+class JobQueue:
+
+    def __init__(self, max_workers, max_pending, max_attempts=3,
+                 retry_delay=0.5, max_statuses=10000):
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_statuses = max_statuses
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="media-job"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._statuses = OrderedDict()
+
+    def _set_status(self, key, status):
+        with self._lock:
+            self._statuses[key] = status
+            self._statuses.move_to_end(key)
+            while len(self._statuses) > self.max_statuses:
+                self._statuses.popitem(last=False)
+
+    def _run(self, key, fn, args):
+        try:
+            for attempt in range(self.max_attempts):
+                try:
+                    fn(*args)
+                except Exception:
+                    if attempt + 1 == self.max_attempts:
+                        self._set_status(key, FAILED)
+                        return
+                    time.sleep(self.retry_delay * (2 ** attempt))
+                else:
+                    self._set_status(key, READY)
+                    return
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            if self._statuses.get(key) == PENDING:
+                return True
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            self._statuses[key] = PENDING
+            self._statuses.move_to_end(key)
+        self._executor.submit(self._run, key, fn, args)
+        return True
+
+    def run_inline(self, key, fn, *args):
+        try:
+            fn(*args)
+        except Exception:
+            self._set_status(key, FAILED)
+        else:
+            self._set_status(key, READY)
+
+    def status(self, key):
+        with self._lock:
+            return self._statuses.get(key)
+
+    def pending_count(self):
+        with self._lock:
+            return self._pending
+
+
+media_jobs = JobQueue(MEDIA_WORKERS, MEDIA_QUEUE_LIMIT)
@@ -0,0 +1,33 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+
+# --------------------------------------------------
+# Thread lock + advisory file lock, so read-modify-write
+# sections are safe across sessions and across processes.
+# --------------------------------------------------
+class FileLock:
+
+    def __init__(self, path, thread_lock):
+        self.path = path
+        self.thread_lock = thread_lock
+        self._file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self.thread_lock.release()
@@ -0,0 +1,106 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Budgets for the shared image and audio caches, in megabytes
+IMAGE_CACHE_MB = int(os.environ.get("KMF_IMAGE_CACHE_MB", "64"))
+AUDIO_CACHE_MB = int(os.environ.get("KMF_AUDIO_CACHE_MB", "64"))
+
+
+# --------------------------------------------------
+# LRU cache bounded by total payload size
+#
+# Shared by every session in the process. Values are bytes-like
+# payloads; entries larger than the whole budget are never stored.
+#
+# Keys are split into partitions (partition_of(key), e.g. the tenant).
+# When the budget is exceeded the least recently used entry of the
+# *largest* partition is evicted, so one big family shrinks its own
+# share first instead of pushing out everyone else's hot entries.
+# --------------------------------------------------
+class ByteBudgetLRU:
+
+    def __init__(self, max_bytes, partition_of=None):
+        self.max_bytes = max_bytes
+        self._partition_of = partition_of or (lambda key: None)
+        self._partitions = {}
+        self._partition_bytes = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            items = self._partitions.get(self._partition_of(key))
+            value = items.get(key) if items is not None else None
+            if value is None:
+                self.misses += 1
+                return None
+            items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _remove(self, partition, key):
+        items = self._partitions[partition]
+        size = len(items.pop(key))
+        self._current_bytes -= size
+        self._partition_bytes[partition] -= size
+        if not items:
+            del self._partitions[partition]
+            del self._partition_bytes[partition]
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        partition = self._partition_of(key)
+        with self._lock:
+            if key in self._partitions.get(partition, ()):
+                self._remove(partition, key)
+            self._partitions.setdefault(partition, OrderedDict())[key] = value
+            self._partition_bytes[partition] = self._partition_bytes.get(partition, 0) + size
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                largest = max(self._partition_bytes, key=self._partition_bytes.get)
+                self._remove(largest, next(iter(self._partitions[largest])))
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def discard(self, predicate):
+        with self._lock:
+            for partition, items in list(self._partitions.items()):
+                for key in [k for k in items if predicate(k)]:
+                    self._remove(partition, key)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+            self._partition_bytes.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": sum(len(items) for items in self._partitions.values()),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "partition_bytes": dict(self._partition_bytes),
+            }
+
+
+# Keys start with the tenant (see utils.images.load_thumbnail and
+# utils.audio.load_audio)
+image_cache = ByteBudgetLRU(IMAGE_CACHE_MB * 1024 * 1024, partition_of=lambda key: key[0])
+audio_cache = ByteBudgetLRU(AUDIO_CACHE_MB * 1024 * 1024, partition_of=lambda key: key[0])
@@ -0,0 +1,223 @@
+import argparse
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from utils.audio import AUDIO_MIME, normalized_path, playable_audio
+from utils.images import THUMBNAIL_SIZES, get_thumbnail, pick_size, thumbnail_path
+from utils.media_store import audio_path, extension_of, image_path, is_blob_key
+from utils.tenants import current_tenant, tenant_exists, use_tenant
+
+# Opt-in. KMF_MEDIA_PORT starts the server inside the Streamlit process;
+# KMF_MEDIA_URL is the address browsers use to reach it (defaults to
+# localhost on that port, set it when the app is accessed remotely or
+# the server runs on its own: python -m utils.media_server).
+MEDIA_PORT = int(os.environ.get("KMF_MEDIA_PORT", "0"))
+MEDIA_URL = os.environ.get("KMF_MEDIA_URL") or (
+    f"http://localhost:{MEDIA_PORT}" if MEDIA_PORT else ""
+)
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Member media that predates the content-addressed store
+_LEGACY_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._ -]*$")
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def _valid_key(key):
+    return is_blob_key(key) or bool(_LEGACY_NAME.match(key or ""))
+
+
+# --------------------------------------------------
+# URLs
+#
+#   <MEDIA_URL>/<tenant>/thumb/<size>/<key>
+#   <MEDIA_URL>/<tenant>/audio/<n|o>/<key>     (normalised / original)
+#
+# Blob keys are content hashes, so these URLs never change meaning and
+# are served as immutable. Legacy filenames get ?v=<mtime> instead
+# and are percent-encoded (they may contain spaces).
+# Return None when media URLs are off or the file is missing; the
+# caller then falls back to sending bytes.
+# --------------------------------------------------
+def _url(kind, variant, key, path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = "" if is_blob_key(key) else f"?v={stat.st_mtime_ns}"
+    return f"{MEDIA_URL}/{current_tenant()}/{kind}/{variant}/{quote(key)}{version}"
+
+
+def thumbnail_url(key, width):
+    if not MEDIA_URL or not _valid_key(key):
+        return None
+    return _url("thumb", pick_size(width), key, image_path(key))
+
+
+def audio_url(key):
+    if not MEDIA_URL or not _valid_key(key):
+        return None
+    path = playable_audio(key)
+    variant = "n" if path == normalized_path(key) else "o"
+    return _url("audio", variant, key, path)
+
+
+# --------------------------------------------------
+# Request handling: ETag / If-None-Match, single byte ranges
+# --------------------------------------------------
+def _resolve(kind, variant, key):
+    if kind == "thumb":
+        if not variant.isdigit() or int(variant) not in THUMBNAIL_SIZES:
+            return None, None, False
+        size = int(variant)
+        path = get_thumbnail(key, size)
+        # get_thumbnail falls back to the original for unreadable images
+        return path, "image/jpeg", path == thumbnail_path(key, size)
+    if kind == "audio" and variant in ("n", "o"):
+        path = normalized_path(key) if variant == "n" else audio_path(key)
+        return path, AUDIO_MIME.get(extension_of(path), "application/octet-stream"), True
+    return None, None, False
+
+
+def parse_range(header, size):
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        length = int(end)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _error(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, send_body):
+        parts = [
+            unquote(part)
+            for part in urlsplit(self.path).path.strip("/").split("/")
+        ]
+        if len(parts) != 4:
+            return self._error(404)
+        tenant, kind, variant, key = parts
+        if not tenant_exists(tenant) or not _valid_key(key):
+            return self._error(404)
+
+        with use_tenant(tenant):
+            path, mime, cacheable = _resolve(kind, variant, key)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            return self._error(404)
+
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        common = [
+            ("ETag", etag),
+            ("Cache-Control", IMMUTABLE if cacheable else "no-cache"),
+            ("Accept-Ranges", "bytes"),
+            ("Access-Control-Allow-Origin", "*"),
+        ]
+        if etag in (self.headers.get("If-None-Match") or ""):
+            return self._error(304, common)
+
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            return self._error(416, [("Content-Range", f"bytes */{size}")])
+
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        self.send_response(206 if byte_range else 200)
+        for name, value in common:
+            self.send_header(name, value)
+        self.send_header("Content-Type", mime)
+        self.send_header("Content-Length", str(length))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if not send_body:
+            return
+
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+# --------------------------------------------------
+# Server lifecycle
+# --------------------------------------------------
+def start_media_server(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), MediaHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name="media-server", daemon=True
+    )
+    thread.start()
+    return server
+
+
+# Called on every rerun; starts the in-process server once
+def ensure_media_server():
+    global _server
+    if not MEDIA_PORT or _server is not None:
+        return
+    with _server_lock:
+        if _server is None:
+            _server = start_media_server(MEDIA_PORT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve family photos and voices")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=MEDIA_PORT or 8502)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), MediaHandler)
+    server.daemon_threads = True
+    print(f"Serving media on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
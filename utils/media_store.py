@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+from utils.helpers import MEDIA_FOLDER, IMAGE_FOLDER, AUDIO_FOLDER
+from utils.locks import FileLock
+from utils.tenants import tenant_path
+
+REFCOUNT_DB = os.path.join(MEDIA_FOLDER, "refcounts.db")
+# Where the counts were kept before the table; imported once
+LEGACY_REFCOUNT_FILE = os.path.join(MEDIA_FOLDER, "refcounts.json")
+
+REFCOUNT_SCHEMA = (
+    "CREATE TABLE refcounts (key TEXT PRIMARY KEY, count INTEGER NOT NULL)"
+)
+
+# Blob keys look like "<sha256 hex><ext>", e.g. "9f86d0...a08.jpg"
+_BLOB_KEY = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]+)?$")
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# --------------------------------------------------
+# Content-addressed media store
+#
+# Uploads are stored once per distinct content under
+# data/media/<aa>/<bb>/<sha256><ext>. Member records keep the blob
+# key, a small SQLite table tracks how many members use each blob
+# (one row per blob, so a reference change costs O(log n) whatever
+# the size of the store), and a blob is removed when its last member
+# is deleted. Each family has its own store (and refcounts) under its
+# tenant folder.
+# --------------------------------------------------
+def is_blob_key(key):
+    return bool(key) and _BLOB_KEY.match(key) is not None
+
+
+def blob_path(key):
+    return os.path.join(tenant_path(MEDIA_FOLDER), key[:2], key[2:4], key)
+
+
+def image_path(key):
+    if is_blob_key(key):
+        return blob_path(key)
+    return os.path.join(tenant_path(IMAGE_FOLDER), key)
+
+
+def audio_path(key):
+    if is_blob_key(key):
+        return blob_path(key)
+    return os.path.join(tenant_path(AUDIO_FOLDER), key)
+
+
+def extension_of(filename):
+    return os.path.splitext(filename)[1].lower()
+
+
+def _refcount_db():
+    return tenant_path(REFCOUNT_DB)
+
+
+def _locked():
+    return FileLock(_refcount_db() + ".lock", _lock)
+
+
+# One connection per thread and family, as in SqliteStorage. Callers
+# hold the lock, so the first one creates the table (importing the
+# old refcounts.json) without racing anyone.
+def _connect():
+    path = _refcount_db()
+    connections = _local.__dict__.setdefault("connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[path] = conn
+        created = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'refcounts'"
+        ).fetchone()
+        if created is None:
+            with conn:
+                conn.execute(REFCOUNT_SCHEMA)
+                _import_legacy_refcounts(conn)
+    return conn
+
+
+def _import_legacy_refcounts(conn):
+    legacy = tenant_path(LEGACY_REFCOUNT_FILE)
+    try:
+        with open(legacy, "r") as f:
+            refcounts = json.load(f)
+    except FileNotFoundError:
+        return
+    except ValueError:
+        refcounts = None
+    if not isinstance(refcounts, dict):
+        # Corrupt: an empty table would let release() delete blobs
+        # still in use
+        _rebuild_refcounts(conn)
+    else:
+        conn.executemany(
+            "INSERT INTO refcounts (key, count) VALUES (?, ?)", refcounts.items()
+        )
+    os.replace(legacy, legacy + ".migrated")
+
+
+# Recounts every blob reference from the member records. Blobs taken
+# by uploads not saved yet are missed, so release() never deletes a
+# key the table does not know.
+def _rebuild_refcounts(conn):
+    from utils.family_repository import load_family_data
+
+    refcounts = {}
+    for member in load_family_data():
+        for field in ("image", "audio"):
+            key = member.get(field)
+            if is_blob_key(key):
+                refcounts[key] = refcounts.get(key, 0) + 1
+    conn.execute("DELETE FROM refcounts")
+    conn.executemany(
+        "INSERT INTO refcounts (key, count) VALUES (?, ?)", refcounts.items()
+    )
+
+
+def temp_folder():
+    path = os.path.join(tenant_path(MEDIA_FOLDER), "tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# Moves a fully written temp file (already hashed by the caller) into
+# place, or drops it if that content is stored already, and takes one
+# reference. The temp file must live on the same filesystem
+# (see temp_folder()) so the move is an atomic rename.
+def put_file(tmp_path, digest, ext):
+    key = digest + ext
+    path = blob_path(key)
+    with _locked():
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        conn = _connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO refcounts (key, count) VALUES (?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET count = count + 1",
+                (key,),
+            )
+    return key
+
+
+# Drops one reference; returns True when the blob itself was removed
+def release(key):
+    if not is_blob_key(key):
+        return False
+    with _locked():
+        conn = _connect()
+        with conn:
+            row = conn.execute(
+                "SELECT count FROM refcounts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                # Out-of-date counts: recount from the member records
+                # and keep the blob
+                _rebuild_refcounts(conn)
+                return False
+            if row[0] > 1:
+                conn.execute(
+                    "UPDATE refcounts SET count = count - 1 WHERE key = ?", (key,)
+                )
+                return False
+            conn.execute("DELETE FROM refcounts WHERE key = ?", (key,))
+        try:
+            os.remove(blob_path(key))
+        except FileNotFoundError:
+            pass
+    return True
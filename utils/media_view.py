@@ -0,0 +1,36 @@
+import streamlit as st
+
+from utils.audio import load_audio
+from utils.images import load_thumbnail
+from utils.media_server import audio_url, thumbnail_url
+
+
+# --------------------------------------------------
+# Photo / voice widgets used by every screen
+#
+# With the media server on, the browser gets a cacheable URL and no
+# bytes go through Streamlit; otherwise the cached bytes are sent.
+# --------------------------------------------------
+def show_photo(key, width):
+    url = thumbnail_url(key, width)
+    if url:
+        st.image(url, width=width)
+        return
+    photo = load_thumbnail(key, width)
+    if photo:
+        st.image(photo, width=width, output_format="JPEG")
+
+
+def play_voice(key):
+    url = audio_url(key)
+    if url:
+        st.audio(url)
+        return
+    data, mime = load_audio(key)
+    if data:
+        st.audio(data, format=mime)
+
+
+# Thumbnail for HTML built by hand (e.g. the maze board): URL or bytes
+def photo_source(key, width):
+    return thumbnail_url(key, width) or load_thumbnail(key, width)
@@ -0,0 +1,65 @@
+import os
+
+import streamlit as st
+
+PAGE_SIZE = int(os.environ.get("KMF_GRID_PAGE_SIZE", "12"))
+
+
+def _matches(member, query):
+    return (
+        query in member["name"].casefold()
+        or query in member["relationship"].casefold()
+    )
+
+
+# --------------------------------------------------
+# Paginated member grid
+#
+# Renders one page of cards (render_card(member) is called inside
+# each column) so the widget count depends on page_size, not on the
+# size of the family. Search and paging controls only appear once
+# the family no longer fits on one page. `key` namespaces the grid's
+# own widgets and its page number in session state.
+# --------------------------------------------------
+def member_grid(members, key, render_card, columns=3, page_size=PAGE_SIZE):
+    page_key = f"{key}_page"
+    query_key = f"{key}_query"
+
+    if len(members) > page_size:
+        query = st.text_input(
+            "🔍 Search by name or relationship",
+            key=f"{key}_search",
+        ).strip().casefold()
+        if query != st.session_state.get(query_key, ""):
+            st.session_state[query_key] = query
+            st.session_state[page_key] = 0
+        if query:
+            members = [m for m in members if _matches(m, query)]
+
+    page_count = max(1, -(-len(members) // page_size))
+    page = min(st.session_state.get(page_key, 0), page_count - 1)
+
+    start = page * page_size
+    cols = st.columns(columns)
+    for idx, member in enumerate(members[start:start + page_size]):
+        with cols[idx % columns]:
+            render_card(member)
+
+    if not members:
+        st.caption("No family members match your search.")
+
+    if page_count > 1:
+        prev_col, label_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            if st.button("◀ Previous", key=f"{key}_prev", disabled=page == 0):
+                st.session_state[page_key] = page - 1
+                st.rerun()
+        with label_col:
+            st.markdown(
+                f"<div style='text-align:center'>Page {page + 1} of {page_count}</div>",
+                unsafe_allow_html=True,
+            )
+        with next_col:
+            if st.button("Next ▶", key=f"{key}_next", disabled=page >= page_count - 1):
+                st.session_state[page_key] = page + 1
+                st.rerun()
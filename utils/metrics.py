@@ -0,0 +1,141 @@
+import json
+import os
+import pickle
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from utils.helpers import METRICS_FILE, PROMETHEUS_FILE
+
+# Opt-in: KMF_METRICS=1 for every session, or ?debug=1 for one session
+METRICS_ENV = os.environ.get("KMF_METRICS", "") == "1"
+
+_local = threading.local()
+_export_lock = threading.Lock()
+
+# Process-wide totals for the Prometheus export
+_reruns = defaultdict(int)
+_rerun_seconds = defaultdict(float)
+_timer_seconds = defaultdict(float)
+_counters = defaultdict(float)
+
+
+# --------------------------------------------------
+# Per-rerun recorder
+#
+# Streamlit runs each session's script on its own thread, so the
+# current rerun lives in a thread-local. timer()/count() are no-ops
+# outside an instrumented rerun (e.g. on background job threads).
+# --------------------------------------------------
+class RerunMetrics:
+
+    __slots__ = ("page", "started", "timers", "counters")
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.timers = defaultdict(float)
+        self.counters = defaultdict(float)
+
+    def as_dict(self):
+        return {
+            "page": self.page,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "timers_ms": {k: round(v * 1000, 3) for k, v in self.timers.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def current():
+    return getattr(_local, "rerun", None)
+
+
+def begin_rerun(page):
+    _local.rerun = RerunMetrics(page)
+    return _local.rerun
+
+
+def end_rerun():
+    rerun = current()
+    _local.rerun = None
+    if rerun is None:
+        return None
+    record = rerun.as_dict()
+    _export(record)
+    return record
+
+
+@contextmanager
+def timer(name):
+    rerun = current()
+    if rerun is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rerun.timers[name] += time.perf_counter() - start
+
+
+def count(name, amount=1):
+    rerun = current()
+    if rerun is not None:
+        rerun.counters[name] += amount
+
+
+# --------------------------------------------------
+# Export: one JSON line per rerun + Prometheus text totals
+# --------------------------------------------------
+def _export(record):
+    page = record["page"]
+    with _export_lock:
+        _reruns[page] += 1
+        _rerun_seconds[page] += record["total_ms"] / 1000
+        for name, ms in record["timers_ms"].items():
+            _timer_seconds[name] += ms / 1000
+        for name, amount in record["counters"].items():
+            _counters[name] += amount
+
+        try:
+            os.makedirs(os.path.dirname(METRICS_FILE), exist_ok=True)
+            with open(METRICS_FILE, "a") as f:
+                f.write(json.dumps({"ts": time.time(), **record}) + "\n")
+            _write_prometheus()
+        except OSError:
+            pass
+
+
+def _write_prometheus():
+    lines = [
+        "# TYPE kmf_reruns_total counter",
+        *(f'kmf_reruns_total{{page="{p}"}} {n}' for p, n in sorted(_reruns.items())),
+        "# TYPE kmf_rerun_seconds_sum counter",
+        *(f'kmf_rerun_seconds_sum{{page="{p}"}} {s:.6f}'
+          for p, s in sorted(_rerun_seconds.items())),
+        "# TYPE kmf_timer_seconds_sum counter",
+        *(f'kmf_timer_seconds_sum{{name="{n}"}} {s:.6f}'
+          for n, s in sorted(_timer_seconds.items())),
+        "# TYPE kmf_events_total counter",
+        *(f'kmf_events_total{{name="{n}"}} {v:g}' for n, v in sorted(_counters.items())),
+    ]
+    tmp_path = f"{PROMETHEUS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, PROMETHEUS_FILE)
+
+
+# --------------------------------------------------
+# Session footprint: pickled size of each session-state entry, in
+# bytes (what the session costs to keep, not the shared objects it
+# points at). Entries that cannot be pickled are left out.
+# --------------------------------------------------
+def session_footprint(state):
+    sizes = {}
+    for key, value in state.items():
+        try:
+            sizes[key] = len(pickle.dumps(value))
+        except Exception:
+            pass
+    return sizes
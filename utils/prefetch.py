@@ -0,0 +1,34 @@
+from utils.audio import load_audio
+from utils.images import load_thumbnail
+from utils.jobs import media_jobs
+from utils.tenants import bind_current, current_tenant
+
+# Most members warmed for one round, so a huge family cannot flood
+# the job queue
+PREFETCH_LIMIT = 24
+
+
+# --------------------------------------------------
+# Background warm-up of the next round
+#
+# Screens describe the round they will show next; its thumbnails and
+# audio are loaded into the shared caches on a media worker, so the
+# rerun that shows it finds everything in memory. Best effort: when
+# the queue is full the round is simply loaded on demand.
+# --------------------------------------------------
+def warm_media(images=(), audio=()):
+    for key, width in images[:PREFETCH_LIMIT]:
+        load_thumbnail(key, width)
+    for key in audio[:PREFETCH_LIMIT]:
+        load_audio(key)
+
+
+# name identifies the round; the same round is only warmed once
+def prefetch(name, fn, *args):
+    job = ("prefetch", current_tenant(), name)
+    if media_jobs.status(job) is None:
+        media_jobs.submit(job, bind_current(fn), *args)
+
+
+def prefetch_media(name, images=(), audio=()):
+    prefetch(name, warm_media, tuple(images), tuple(audio))
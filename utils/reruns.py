@@ -0,0 +1,74 @@
+import functools
+import threading
+from contextlib import contextmanager
+
+import streamlit as st
+
+from utils.metrics import METRICS_ENV, begin_rerun, end_rerun
+from utils.tenants import tenant_bound, use_tenant
+
+METRICS_HISTORY = 20
+
+_local = threading.local()
+
+
+# --------------------------------------------------
+# Per-session metrics switches / history (shown by the debug panel)
+# --------------------------------------------------
+def metrics_enabled():
+    return METRICS_ENV or st.session_state.get("debug_metrics", False)
+
+
+def record_rerun(record):
+    if record is None:
+        return
+    history = st.session_state.setdefault("metrics_history", [])
+    history.append(record)
+    del history[:-METRICS_HISTORY]
+
+
+# One instrumented run (full rerun or fragment) under the session's tenant
+@contextmanager
+def session_run(name):
+    with use_tenant(st.session_state.tenant):
+        if not metrics_enabled():
+            yield
+            return
+        begin_rerun(name)
+        try:
+            yield
+        finally:
+            # st.rerun() unwinds through here too; those reruns are kept
+            record_rerun(end_rerun())
+
+
+# --------------------------------------------------
+# Partial reruns
+#
+# A click inside a fragment reruns only that function, not app.py, so
+# nothing outside it (styles, setup check, tenant binding, metrics)
+# runs again. The wrapper restores the session's tenant and records the
+# fragment rerun as its own "<page>:fragment" entry. During a full
+# rerun it just calls through.
+# --------------------------------------------------
+def fragment(fn):
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        if tenant_bound():
+            return fn(*args, **kwargs)
+        _local.partial = True
+        try:
+            with session_run(f"{st.session_state.page}:fragment"):
+                return fn(*args, **kwargs)
+        finally:
+            _local.partial = False
+
+    return st.fragment(run)
+
+
+# Redraw the calling fragment (the whole page if it is running as
+# part of a full rerun, where a fragment-scoped rerun is not allowed)
+def rerun_fragment():
+    if getattr(_local, "partial", False):
+        st.rerun(scope="fragment")
+    st.rerun()
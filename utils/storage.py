@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+from utils.helpers import DATA_FILE, DATABASE_FILE
+from utils.locks import FileLock
+from utils.tenants import tenant_path
+
+# "json" (default) or "sqlite"
+STORAGE_BACKEND = os.environ.get("KMF_STORAGE", "json").lower()
+
+MEMBER_FIELDS = ("name", "relationship", "image", "audio")
+
+# Result of a single-member write: the record before and after (None
+# for an add / delete) and the storage signature on either side of
+# the write, both taken under the write lock. A repository whose cache
+# matches signature_before can apply the change in memory instead of
+# reloading, because nobody else wrote in between. The changes from
+# one batch write (add_members) all carry that batch's signatures.
+Change = namedtuple("Change", "old new signature_before signature_after")
+
+
+def _new_record(member_id, member):
+    record = {"id": member_id}
+    record.update({field: member.get(field) for field in MEMBER_FIELDS})
+    return record
+
+
+def _assign_missing_ids(members):
+    next_id = max((m["id"] for m in members if "id" in m), default=0) + 1
+    for member in members:
+        if "id" not in member:
+            member["id"] = next_id
+            next_id += 1
+    return members
+
+
+# --------------------------------------------------
+# JSON file backend
+#
+# Every write re-reads the file under a lock and replaces it
+# atomically, so parallel sessions never see a half-written file
+# or overwrite each other's changes.
+# --------------------------------------------------
+class JsonStorage:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return _assign_missing_ids(json.load(f))
+
+    def _write(self, members):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(members, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _locked(self):
+        return FileLock(self.path + ".lock", self._lock)
+
+    # Ids are never reused: the highest id ever handed out is kept in a
+    # sidecar file, so deleting the newest member (or everyone) does not
+    # give their id, and with it their place in open games, to the next
+    # person added. Callers hold the lock.
+    def _next_id_path(self):
+        return self.path + ".next_id"
+
+    def _take_ids(self, members, count):
+        try:
+            with open(self._next_id_path(), "r") as f:
+                next_id = int(f.read())
+        except (OSError, ValueError):
+            next_id = 1
+        next_id = max(next_id, max((m["id"] for m in members), default=0) + 1)
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self._next_id_path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(next_id + count))
+        os.replace(tmp_path, self._next_id_path())
+        return next_id
+
+    def load(self):
+        return self._read()
+
+    def add_member(self, member):
+        with self._locked():
+            before = self.signature()
+            members = self._read()
+            record = _new_record(self._take_ids(members, 1), member)
+            members.append(record)
+            self._write(members)
+            return Change(None, record, before, self.signature())
+
+    # Many members in a single rewrite of the file
+    def add_members(self, new_members):
+        with self._locked():
+            before = self.signature()
+            members = self._read()
+            next_id = self._take_ids(members, len(new_members))
+            records = [_new_record(next_id + i, m) for i, m in enumerate(new_members)]
+            members.extend(records)
+            self._write(members)
+            after = self.signature()
+        return [Change(None, record, before, after) for record in records]
+
+    def update_member(self, member_id, changes):
+        with self._locked():
+            before = self.signature()
+            members = self._read()
+            for index, old in enumerate(members):
+                if old["id"] == member_id:
+                    break
+            else:
+                return Change(None, None, before, before)
+            if not any(f in changes for f in MEMBER_FIELDS):
+                return Change(old, old, before, before)
+            record = dict(old)
+            record.update({f: changes[f] for f in MEMBER_FIELDS if f in changes})
+            members[index] = record
+            self._write(members)
+            return Change(old, record, before, self.signature())
+
+    def delete_member(self, member_id):
+        with self._locked():
+            before = self.signature()
+            members = self._read()
+            old = next((m for m in members if m["id"] == member_id), None)
+            if old is None:
+                return Change(None, None, before, before)
+            self._write([m for m in members if m["id"] != member_id])
+            return Change(old, None, before, self.signature())
+
+
+# --------------------------------------------------
+# SQLite backend
+#
+# One row per member, indexed by id. Writes are single-row
+# transactions; WAL mode lets readers in other sessions carry on
+# while a parent is adding or deleting someone. A trigger bumps a
+# version counter on every change so the repository can tell when
+# to reload without reading the table.
+# --------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    relationship TEXT NOT NULL,
+    image TEXT NOT NULL,
+    audio TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS members_insert AFTER INSERT ON members
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS members_update AFTER UPDATE ON members
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS members_delete AFTER DELETE ON members
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+"""
+
+
+class SqliteStorage:
+
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        if legacy_json_path:
+            self._migrate_from_json(legacy_json_path)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_from_json(self, json_path):
+        # One-time import on the first start. The flag is written even
+        # when there is no JSON file, so one appearing later is never
+        # merged into (and clashing with) members added since.
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            migrated = conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated'"
+            ).fetchone()
+            if migrated is not None:
+                return
+            filled = conn.execute("SELECT 1 FROM members LIMIT 1").fetchone()
+            if filled is None and os.path.exists(json_path):
+                with open(json_path, "r") as f:
+                    members = _assign_missing_ids(json.load(f))
+                conn.executemany(
+                    "INSERT INTO members (id, name, relationship, image, audio) "
+                    "VALUES (:id, :name, :relationship, :image, :audio)",
+                    [{"audio": None, **m} for m in members],
+                )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated', 1)")
+
+    def signature(self, conn=None):
+        row = (conn or self._connect()).execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        return row[0]
+
+    def load(self):
+        rows = self._connect().execute(
+            "SELECT id, name, relationship, image, audio FROM members ORDER BY id"
+        )
+        return [dict(row) for row in rows]
+
+    def _get(self, conn, member_id):
+        row = conn.execute(
+            "SELECT id, name, relationship, image, audio FROM members WHERE id = ?",
+            (member_id,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def add_member(self, member):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.signature(conn)
+            cursor = conn.execute(
+                "INSERT INTO members (name, relationship, image, audio) "
+                "VALUES (?, ?, ?, ?)",
+                [member.get(field) for field in MEMBER_FIELDS],
+            )
+            record = _new_record(cursor.lastrowid, member)
+            return Change(None, record, before, self.signature(conn))
+
+    # Many members in one transaction
+    def add_members(self, new_members):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.signature(conn)
+            records = []
+            for member in new_members:
+                cursor = conn.execute(
+                    "INSERT INTO members (name, relationship, image, audio) "
+                    "VALUES (?, ?, ?, ?)",
+                    [member.get(field) for field in MEMBER_FIELDS],
+                )
+                records.append(_new_record(cursor.lastrowid, member))
+            after = self.signature(conn)
+        return [Change(None, record, before, after) for record in records]
+
+    def update_member(self, member_id, changes):
+        fields = [f for f in MEMBER_FIELDS if f in changes]
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.signature(conn)
+            old = self._get(conn, member_id)
+            if old is None or not fields:
+                return Change(old, old, before, before)
+            conn.execute(
+                f"UPDATE members SET {', '.join(f'{f} = ?' for f in fields)} WHERE id = ?",
+                [changes[f] for f in fields] + [member_id],
+            )
+            return Change(old, self._get(conn, member_id), before, self.signature(conn))
+
+    def delete_member(self, member_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.signature(conn)
+            old = self._get(conn, member_id)
+            if old is None:
+                return Change(None, None, before, before)
+            conn.execute("DELETE FROM members WHERE id = ?", (member_id,))
+            return Change(old, None, before, self.signature(conn))
+
+
+# --------------------------------------------------
+# Backend selection
+# --------------------------------------------------
+# Storage for the current tenant
+def create_storage(backend=STORAGE_BACKEND):
+    if backend == "sqlite":
+        return SqliteStorage(
+            tenant_path(DATABASE_FILE), legacy_json_path=tenant_path(DATA_FILE)
+        )
+    if backend == "json":
+        return JsonStorage(tenant_path(DATA_FILE))
+    raise ValueError(f"Unknown storage backend: {backend!r}")
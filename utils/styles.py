@@ -0,0 +1,162 @@
+import functools
+
+import streamlit as st
+
+# --------------------------------------------------
+# App-wide rules (shared by every screen)
+# --------------------------------------------------
+BASE_CSS = """
+    /* Full app background */
+    body {
+        background-color: #a5cad2;
+    }
+
+    /* Streamlit app container */
+    .stApp {
+        background-color: #a5cad2;
+    }
+    .stButton>button {
+        width: 100%;
+        border-radius: 10px;
+        padding: 8px;
+        font-size: 15px;
+    }
+"""
+
+# --------------------------------------------------
+# Per-screen rules, layered on top of BASE_CSS
+# --------------------------------------------------
+PAGE_CSS = {
+    "home": """
+    .main {
+        background-color: #6f5f90;
+    }
+    h1 {
+        text-align: center;
+        color: #3b3b3b;
+    }
+    .subtitle {
+        text-align: center;
+        font-size: 18px;
+        color: #666;
+        margin-bottom: 30px;
+    }
+    .card {
+        background-color: white;
+        padding: 25px;
+        border-radius: 16px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
+        height: 100%;
+    }
+    .stButton>button {
+        padding: 10px;
+        font-size: 16px;
+    }
+    .parent-box {
+        background-color: #fff3cd;
+        padding: 15px;
+        border-radius: 12px;
+        margin-bottom: 20px;
+    }
+""",
+    "setup": """
+    .main {
+        background-color: #758eb7;
+    }
+    .card {
+        background-color: white;
+        padding: 25px;
+        border-radius: 16px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
+        margin-bottom: 20px;
+    }
+    .member-card {
+        background-color: #ffffff;
+        padding: 15px;
+        border-radius: 14px;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
+        text-align: center;
+    }
+""",
+    "meet_my_family": """
+    .main {
+        background-color: #ff7b89;
+    }
+    .card {
+        background-color: white;
+        padding: 18px;
+        border-radius: 16px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
+        margin-bottom: 15px;
+        text-align: center;
+    }
+    .name-card {
+        padding: 10px;
+        border-radius: 10px;
+        margin-bottom: 8px;
+    }
+    .selected {
+        background-color: #e0f0ff;
+        border: 2px solid #4da6ff;
+    }
+    .matched {
+        background-color: #e6ffea;
+        border: 2px solid #5cb85c;
+    }
+""",
+    "find_my_family": """
+    .main {
+        background-color: #a5cad2;
+    }
+    .card {
+        background-color: white;
+        padding: 16px;
+        border-radius: 16px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
+        margin-bottom: 15px;
+        text-align: center;
+    }
+    .maze-cell {
+        font-size: 28px;
+        text-align: center;
+    }
+    .stButton>button {
+        padding: 10px;
+        font-size: 16px;
+    }
+""",
+    "who_is_speaking": """
+    .main {
+        background-color: #8a5082;
+    }
+    .card {
+        background-color: white;
+        padding: 18px;
+        border-radius: 16px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
+        margin-bottom: 15px;
+        text-align: center;
+    }
+    .option-card {
+        background-color: #ffffff;
+        padding: 15px;
+        border-radius: 14px;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
+        text-align: center;
+    }
+""",
+}
+
+
+# --------------------------------------------------
+# One <style> block per page, built once per process
+# --------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def stylesheet(page):
+    return f"<style>{BASE_CSS}{PAGE_CSS.get(page, '')}</style>"
+
+
+# Streamlit drops any element a rerun does not emit again, so the
+# (cached) stylesheet is written once per rerun, not once per import.
+def inject_styles(page):
+    st.markdown(stylesheet(page), unsafe_allow_html=True)
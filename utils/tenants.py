@@ -0,0 +1,129 @@
+import functools
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+from utils.helpers import DATA_FOLDER, TENANTS_FOLDER
+
+# The default tenant keeps using data/ directly, so single-family
+# installs need no migration. Every other tenant gets the same layout
+# under data/tenants/<tenant>/.
+DEFAULT_TENANT = "default"
+
+# Tenant for threads no session is bound to (CLIs, e.g.
+# KMF_TENANT=school-a python -m utils.bulk import family.zip)
+PROCESS_TENANT = os.environ.get("KMF_TENANT", DEFAULT_TENANT)
+
+_TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+_local = threading.local()
+
+
+def is_valid_tenant(tenant):
+    return bool(tenant) and _TENANT_ID.match(tenant) is not None
+
+
+# --------------------------------------------------
+# Provisioning
+#
+# A family exists once its data/tenants/<tenant>/ folder does; only
+# then can a family link (or the media server) bind to it, so made-up
+# ids never create storage or repositories. The default and process
+# tenants always exist.
+#
+#   python -m utils.tenants create <id> | list
+# --------------------------------------------------
+def _tenant_folder(tenant):
+    return os.path.join(TENANTS_FOLDER, tenant)
+
+
+def tenant_exists(tenant):
+    if not is_valid_tenant(tenant):
+        return False
+    if tenant in (DEFAULT_TENANT, PROCESS_TENANT):
+        return True
+    return os.path.isdir(_tenant_folder(tenant))
+
+
+def create_tenant(tenant):
+    if not is_valid_tenant(tenant):
+        raise ValueError(f"Invalid family id: {tenant!r}")
+    os.makedirs(_tenant_folder(tenant), exist_ok=True)
+
+
+def list_tenants():
+    try:
+        names = os.listdir(TENANTS_FOLDER)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if tenant_exists(name))
+
+
+# --------------------------------------------------
+# Current tenant
+#
+# Bound per thread, like the rerun metrics: app.py binds the session's
+# tenant around each rerun, and work handed to other threads is
+# wrapped with bind_current() so it runs against the same tenant.
+# --------------------------------------------------
+def current_tenant():
+    return getattr(_local, "tenant", None) or PROCESS_TENANT
+
+
+# True inside use_tenant() (e.g. a full app rerun)
+def tenant_bound():
+    return getattr(_local, "tenant", None) is not None
+
+
+@contextmanager
+def use_tenant(tenant):
+    if not is_valid_tenant(tenant):
+        raise ValueError(f"Invalid family id: {tenant!r}")
+    previous = getattr(_local, "tenant", None)
+    _local.tenant = tenant
+    try:
+        yield tenant
+    finally:
+        _local.tenant = previous
+
+
+def _call_as(tenant, fn, *args, **kwargs):
+    with use_tenant(tenant):
+        return fn(*args, **kwargs)
+
+
+def bind_current(fn):
+    return functools.partial(_call_as, current_tenant(), fn)
+
+
+# --------------------------------------------------
+# Paths: data/<x> -> data/tenants/<tenant>/<x>
+# --------------------------------------------------
+def tenant_path(path):
+    tenant = current_tenant()
+    if tenant == DEFAULT_TENANT:
+        return path
+    return os.path.join(TENANTS_FOLDER, tenant, os.path.relpath(path, DATA_FOLDER))
+
+
+def main(argv):
+    if len(argv) == 2 and argv[0] == "create":
+        try:
+            create_tenant(argv[1])
+        except ValueError as e:
+            print(e)
+            return 2
+        print(f"Family {argv[1]!r} is ready: open the app with ?family={argv[1]}")
+        return 0
+    if argv == ["list"]:
+        for tenant in list_tenants():
+            print(tenant)
+        return 0
+    print("usage: python -m utils.tenants create ID | list")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import tempfile
+
+from PIL import Image
+
+from utils.audio import FFMPEG, audio_job, normalize_audio, remove_normalized
+from utils.family_repository import on_member_change
+from utils.images import create_thumbnails, remove_thumbnails
+from utils.jobs import media_jobs, PENDING, READY, FAILED
+from utils.media_store import extension_of, put_file, release, temp_folder
+from utils.tenants import bind_current, current_tenant
+
+CHUNK_SIZE = 256 * 1024
+
+MAX_IMAGE_BYTES = 25 * 1024 * 1024
+# Decoded size limit: a small compressed file can still be huge in pixels
+MAX_IMAGE_PIXELS = 40_000_000
+MAX_AUDIO_BYTES = 50 * 1024 * 1024
+
+# Leading bytes accepted for each allowed extension
+IMAGE_SIGNATURES = {
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+}
+AUDIO_SIGNATURES = {
+    ".mp3": (b"ID3", b"\xff\xfb", b"\xff\xf3", b"\xff\xf2", b"\xff\xfa", b"\xff\xe3"),
+    ".wav": (b"RIFF",),
+    ".ogg": (b"OggS",),
+}
+
+
+class UploadError(ValueError):
+    pass
+
+
+# --------------------------------------------------
+# Chunked ingestion of an uploaded file
+#
+# Copies the upload into a temp file in fixed-size chunks while
+# hashing and checking it, then hands it to the media store, which
+# moves it into place atomically. Nothing is read into memory in
+# one piece, and a rejected upload leaves no file behind.
+# --------------------------------------------------
+def _ingest(uploaded, signatures, max_bytes, label, check=None):
+    ext = extension_of(uploaded.name)
+    if ext not in signatures:
+        raise UploadError(f"{label} must be one of: {', '.join(sorted(signatures))}")
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=temp_folder(), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            uploaded.seek(0)
+            first = True
+            while True:
+                chunk = uploaded.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if first:
+                    if not chunk.startswith(signatures[ext]):
+                        raise UploadError(f"{label} does not look like a {ext} file.")
+                    first = False
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(
+                        f"{label} is too large (limit {max_bytes // (1024 * 1024)} MB)."
+                    )
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise UploadError(f"{label} is empty.")
+        if check:
+            check(tmp_path)
+        return put_file(tmp_path, digest.hexdigest(), ext)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Reads only the header, so the pixel count is known without decoding
+def _check_image(path):
+    too_large = f"Photo has too many pixels (limit {MAX_IMAGE_PIXELS // 1_000_000} megapixels)."
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise UploadError(too_large)
+    except OSError:
+        raise UploadError("Photo could not be read as an image.")
+    if width * height > MAX_IMAGE_PIXELS:
+        raise UploadError(too_large)
+
+
+def ingest_image(uploaded):
+    return _ingest(uploaded, IMAGE_SIGNATURES, MAX_IMAGE_BYTES, "Photo", _check_image)
+
+
+def ingest_audio(uploaded):
+    return _ingest(uploaded, AUDIO_SIGNATURES, MAX_AUDIO_BYTES, "Voice recording")
+
+
+# Photo plus optional voice; nothing is kept if either one is rejected
+def ingest_member_media(image_file, audio_file=None):
+    image_key = ingest_image(image_file)
+    audio_key = None
+    if audio_file:
+        try:
+            audio_key = ingest_audio(audio_file)
+        except BaseException:
+            release(image_key)
+            raise
+    return image_key, audio_key
+
+
+# --------------------------------------------------
+# Post-processing off the request thread
+# --------------------------------------------------
+def _thumbnail_job(image_key):
+    return ("thumbnails", current_tenant(), image_key)
+
+
+def _submit(key, fn, arg, inline):
+    if not media_jobs.submit(key, bind_current(fn), arg) and inline:
+        # Queue is full: do the work now rather than pile up more
+        media_jobs.run_inline(key, fn, arg)
+
+
+# inline=False skips work the queue has no room for; thumbnails and
+# normalised audio are then produced lazily the first time they are shown
+def schedule_post_processing(image_key, audio_key=None, inline=True):
+    if image_key:
+        _submit(_thumbnail_job(image_key), create_thumbnails, image_key, inline)
+    if audio_key and FFMPEG is not None:
+        _submit(audio_job(audio_key), normalize_audio, audio_key, inline)
+
+
+# Combined status of a member's media jobs: PENDING, FAILED or READY.
+# Members whose media was never scheduled in this process count as READY.
+def post_processing_status(member):
+    statuses = [media_jobs.status(_thumbnail_job(member["image"]))]
+    if member.get("audio"):
+        statuses.append(media_jobs.status(audio_job(member["audio"])))
+    if FAILED in statuses:
+        return FAILED
+    if PENDING in statuses:
+        return PENDING
+    return READY
+
+
+# --------------------------------------------------
+# Media cleanup when a member is updated or deleted
+#
+# Only the photo / voice the member no longer points at is released,
+# and only its own thumbnails and normalised audio are dropped.
+# --------------------------------------------------
+def release_replaced_media(change):
+    if change.old is None:
+        return
+    new = change.new or {}
+    image = change.old.get("image")
+    if image and image != new.get("image") and release(image):
+        remove_thumbnails(image)
+    audio = change.old.get("audio")
+    if audio and audio != new.get("audio") and release(audio):
+        remove_normalized(audio)
+
+
+on_member_change(release_replaced_media)